@@ -0,0 +1,165 @@
+from models import iter_bits
+
+# Нижние границы числа цветов для подграфа оставшихся вершин.
+# Подграф задаётся битовой маской remaining, masks[v] - соседи v.
+
+
+def gap_statistics(num_colors, lower_bound):
+    """Поля lower_bound, gap и optimal статистики решателя. Правильная раскраска
+    не может быть меньше доказанной нижней оценки: такой результат - ошибка,
+    он не считается оптимальным, а разрыв не определён (None)"""
+    gap = num_colors - lower_bound
+    return {
+        "lower_bound": lower_bound,
+        "gap": gap if gap >= 0 else None,
+        "optimal": gap == 0,
+    }
+
+
+class GreedyCliqueBound:
+    # Жадная клика в порядке номеров вершин (исходная граница решателя)
+    name = "greedy"
+    
+    def compute(self, masks, remaining):
+        clique = 0
+        res = 0
+        for v in iter_bits(remaining):
+            if clique & masks[v] == clique:
+                clique |= 1 << v
+                res += 1
+        return res
+
+
+class DegreeCliqueBound:
+    # Жадная клика в порядке убывания степени внутри подграфа
+    name = "degree"
+    
+    def compute(self, masks, remaining):
+        order = sorted(iter_bits(remaining), key=lambda v: -(masks[v] & remaining).bit_count())
+        clique = 0
+        res = 0
+        for v in order:
+            if clique & masks[v] == clique:
+                clique |= 1 << v
+                res += 1
+        return res
+
+
+class ColorClassBound:
+    # Поиск наибольшей клики с отсечением по цветовым классам (схема MCQ):
+    # раскраска кандидатов даёт верхнюю оценку клики, которую можно из них собрать.
+    # Поиск ограничен node_limit узлами, найденная клика - всегда честная граница.
+    # Граф без треугольников, но с нечётным циклом (как у Мычельского) требует 3 цвета.
+    name = "coloring"
+    
+    def __init__(self, node_limit=1000):
+        self.node_limit = node_limit
+    
+    def compute(self, masks, remaining):
+        self.masks = masks
+        self.nodes = 0
+        self.best = DegreeCliqueBound().compute(masks, remaining)
+        self._expand(0, remaining)
+        res = self.best
+        if res < 3 and not self._bipartite(remaining):
+            res = 3
+        return res
+    
+    def _color_sort(self, cand):
+        order = []
+        bounds = []
+        color = 0
+        while cand:
+            color += 1
+            q = cand
+            while q:
+                low = q & -q
+                v = low.bit_length() - 1
+                q &= ~(self.masks[v] | low)
+                cand ^= low
+                order.append(v)
+                bounds.append(color)
+        return order, bounds
+    
+    def _expand(self, size, cand):
+        self.nodes += 1
+        order, bounds = self._color_sort(cand)
+        for i in range(len(order) - 1, -1, -1):
+            if size + bounds[i] <= self.best or self.nodes >= self.node_limit:
+                return
+            v = order[i]
+            new_cand = cand & self.masks[v]
+            if new_cand:
+                self._expand(size + 1, new_cand)
+            elif size + 1 > self.best:
+                self.best = size + 1
+            cand &= ~(1 << v)
+    
+    def _bipartite(self, remaining):
+        masks = self.masks
+        unseen = remaining
+        while unseen:
+            start = unseen & -unseen
+            unseen ^= start
+            sides = [start, 0]
+            frontier = start
+            side = 0
+            while frontier:
+                reach = 0
+                for v in iter_bits(frontier):
+                    reach |= masks[v]
+                reach &= remaining
+                if reach & sides[side]:
+                    return False
+                frontier = reach & unseen
+                unseen &= ~frontier
+                side ^= 1
+                sides[side] |= frontier
+        return True
+
+
+class FractionalBound:
+    # Дробное хроматическое число не меньше |V| / alpha, а alpha не больше
+    # числа клик в любом покрытии вершин кликами - берём жадное покрытие
+    name = "fractional"
+    
+    def compute(self, masks, remaining):
+        size = remaining.bit_count()
+        if not size:
+            return 0
+        cover = 0
+        rest = remaining
+        while rest:
+            low = rest & -rest
+            v = low.bit_length() - 1
+            clique = low
+            cand = rest & masks[v]
+            while cand:
+                u = max(iter_bits(cand), key=lambda w: (cand & masks[w]).bit_count())
+                clique |= 1 << u
+                cand &= masks[u]
+            rest &= ~clique
+            cover += 1
+        return -(-size // cover)
+
+
+BOUNDS = {
+    GreedyCliqueBound.name: GreedyCliqueBound,
+    DegreeCliqueBound.name: DegreeCliqueBound,
+    ColorClassBound.name: ColorClassBound,
+    FractionalBound.name: FractionalBound,
+}
+
+
+def make_bounds(bounds):
+    # Имена или готовые объекты; порядок задаёт порядок вычисления
+    if isinstance(bounds, str) or not isinstance(bounds, (list, tuple)):
+        bounds = [bounds]
+    result = []
+    for b in bounds:
+        if isinstance(b, str):
+            if b not in BOUNDS:
+                raise ValueError(f"Неизвестная граница: {b}")
+            b = BOUNDS[b]()
+        result.append(b)
+    return result
\ No newline at end of file
@@ -1,131 +1,383 @@
+import os
 import time
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from algorithms.bounds import DegreeCliqueBound, make_bounds, gap_statistics
+from algorithms.engine import Budget, run
+from algorithms.saturation import SaturationTracker
+from algorithms.cache import cached_solve, cached_statistics
+from algorithms.heuristics import greedy_coloring
+
+
+class SharedIncumbent(Budget):
+    """Бюджет процесса-исполнителя, который заодно обменивается рекордом best_k
+    с остальными процессами через общую ячейку shared_k"""
+    CHECK_EVERY = 32
+
+    def __init__(self, solver, shared_k, lock, time_limit=None):
+        super().__init__(time_limit)
+        self.solver = solver
+        self.shared_k = shared_k
+        self.lock = lock
+
+    def sync(self):
+        solver = self.solver
+        if solver.best_k < self.shared_k.value:
+            with self.lock:
+                if solver.best_k < self.shared_k.value:
+                    self.shared_k.value = solver.best_k
+        elif self.shared_k.value < solver.best_k:
+            solver.best_k = self.shared_k.value
+
+    def expired(self):
+        self.sync()
+        return super().expired()
+
+
+# Состояние процесса-исполнителя параллельного режима
+_worker = {}
+
+
+def _init_worker(graph, bounds, symmetry, cache_limit, shared_k, lock, counter):
+    with lock:
+        index = counter.value
+        counter.value += 1
+    solver = BranchBoundSolver(graph, cache_limit)
+    solver._reset(bounds, symmetry)
+    _worker.update(solver=solver, shared_k=shared_k, lock=lock, index=index)
+
+
+def _solve_subproblem(task):
+    colors, frame, deadline = task
+    solver = _worker["solver"]
+    time_limit = None if deadline is None else max(0, deadline - time.time())
+    budget = SharedIncumbent(solver, _worker["shared_k"], _worker["lock"], time_limit)
+    completed = solver._resume(colors, frame, budget)
+    budget.sync()
+    return _worker["index"], solver.best, completed, solver.get_statistics()
+
 
 class BranchBoundSolver:
-    def __init__(self, graph):
+    def __init__(self, graph, cache_limit=100000):
         self.graph = graph
         self.n = graph.n
         self.adj = graph.adj
+        self.masks = [graph.neighbor_mask(v) for v in range(self.n)]
+        self.class_masks = [0] * self.n
+        self.tracker = None
+        self.colors = None
         self.best = None
         self.best_k = self.n
         self.nodes = 0
         self.cut = 0
-        self.cache = {}
+        self.uncolored = 0
+        # Кэш границы по маске оставшихся вершин, при переполнении вытесняется
+        # давно не использованная запись. cache_limit - число записей, а не байты:
+        # ключ - маска на n бит, так что запись занимает около n/8 + 100 байт
+        self.cache_limit = cache_limit
+        self.cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_evictions = 0
+        self.bounds = make_bounds("greedy")
+        self.key_shift = 1
+        self.bound_cuts = {}
+        self.lower_bound = 0
+        self.completed = False
+        self.workers = []
+        self.repaired = None
+        # twin_of[v] - класс близнецов вершины v (None - близнецов нет)
+        self.twin_of = [None] * self.n
+        self.twin_classes = 0
 
     def _upper_bound(self):
-        colors = [-1] * self.n
-        order = []
-        for i in range(self.n):
-            order.append((self.graph.degree(i), i))
-        order.sort(reverse=True)
-
-        for deg, v in order:
-            used = []
-            for u in self.graph.neighbors(v):
-                if colors[u] != -1:
-                    used.append(colors[u])
-            used_set = set(used)
-            c = 0
-            while c in used_set:
-                c += 1
-            colors[v] = c
-        return colors
+        return greedy_coloring(self.graph)
     
-    def _clique_bound(self, remaining):
+    def _bound(self, remaining, k):
+        # remaining - битовая маска оставшихся вершин. Границы считаются по очереди,
+        # пока какая-то из них одна не даст отсечение; возвращается максимум и её номер
         if not remaining:
-            return 0
-        key = str(sorted(remaining))
-        if key in self.cache:
-            return self.cache[key]
-        
-        clique = []
-        for v in remaining:
-            ok = True
-            for u in clique:
-                if not self.adj[v][u]:
-                    ok = False
-                    break
-            if ok:
-                clique.append(v)
-        
-        res = len(clique)
-        self.cache[key] = res
-        return res
+            return 0, 0
+        best = 0
+        source = 0
+        for i, bound in enumerate(self.bounds):
+            key = remaining << self.key_shift | i
+            res = self.cache.get(key)
+            if res is not None:
+                self.cache_hits += 1
+                self.cache.move_to_end(key)
+            else:
+                self.cache_misses += 1
+                res = bound.compute(self.masks, remaining)
+                self.cache[key] = res
+                if len(self.cache) > self.cache_limit:
+                    self.cache.popitem(last=False)
+                    self.cache_evictions += 1
+            if res > best:
+                best = res
+                source = i
+            if k + best >= self.best_k:
+                break
+        return best, source
     
     def _select(self, colors):
+        # Во время поиска оценки поддерживает трекер, полный перебор - для вызова извне
+        if self.tracker is not None:
+            return self.tracker.select()
+        neighbor_lists = self.graph.neighbor_lists
+        degrees = self.graph.degrees
         best = -1
         best_score = -1
         for v in range(self.n):
             if colors[v] == -1:
                 cnt = 0
-                for u in self.graph.neighbors(v):
+                for u in neighbor_lists[v]:
                     if colors[u] != -1:
                         cnt += 1
-                score = self.graph.degree(v) * 2 + cnt
+                score = degrees[v] * 2 + cnt
                 if score > best_score:
                     best_score = score
                     best = v
         return best
     
-    def _search(self, colors, k, bound):
-        self.nodes += 1
-        if k + bound >= self.best_k:
-            self.cut += 1
-            return
-        
-        v = self._select(colors)
-        if v == -1:
-            if k < self.best_k:
-                self.best_k = k
-                self.best = colors.copy()
-            return
-        
-        remaining = []
-        for i in range(self.n):
-            if colors[i] == -1 and i != v:
-                remaining.append(i)
+    def _assign(self, colors, v, c):
+        colors[v] = c
+        self.class_masks[c] |= 1 << v
+        self.uncolored ^= 1 << v
+        self.tracker.assign(v)
+    
+    def _unassign(self, colors, v, c):
+        self.tracker.unassign(v)
+        self.class_masks[c] ^= 1 << v
+        self.uncolored ^= 1 << v
+        colors[v] = -1
+    
+    def _search(self, frame):
+        # Шаг поиска для algorithms.engine.run.
+        # Кадр: [k, bound, source, v, remaining, next_c, active], v is None - узел ещё не открыт,
+        # active - цвет, с которым v ушла в дочерний узел (-1, если такого нет)
+        colors = self.colors
+        k = frame[0]
+        bound = frame[1]
+        v = frame[3]
+        if v is None:
+            self.nodes += 1
+            if k + bound >= self.best_k:
+                self.cut += 1
+                self.bound_cuts[self.bounds[frame[2]].name] += 1
+                return None
+            
+            v = self._select(colors)
+            if v == -1:
+                if k < self.best_k:
+                    self.best_k = k
+                    self.best = colors.copy()
+                return None
+            
+            frame[3] = v
+            frame[4] = self.uncolored ^ (1 << v)
+            # Близнецы взаимозаменяемы: цвет v больше цветов уже окрашенных близнецов,
+            # перестановки их цветов не перебираются
+            twins = self.twin_of[v]
+            if twins is not None:
+                frame[5] = max(colors[u] for u in twins) + 1
+        else:
+            c = frame[6]
+            self._unassign(colors, v, c)
+            frame[6] = -1
+            if c == k or self.best_k == bound:
+                return None
         
-        for c in range(k):
-            safe = True
-            for u in self.graph.neighbors(v):
-                if colors[u] == c:
-                    safe = False
-                    break
-            if safe:
-                colors[v] = c
-                nb = self._clique_bound(remaining)
-                self._search(colors, k, nb)
-                colors[v] = -1
-                if self.best_k == bound:
-                    return
+        nv = self.masks[v]
+        class_masks = self.class_masks
+        c = frame[5]
+        while c < k:
+            if not nv & class_masks[c]:
+                frame[5] = c + 1
+                frame[6] = c
+                self._assign(colors, v, c)
+                nb, src = self._bound(frame[4], k)
+                return [k, nb, src, None, 0, 0, -1]
+            c += 1
         
+        frame[5] = k + 1
         if k + 1 < self.best_k:
-            colors[v] = k
-            nb = self._clique_bound(remaining)
-            self._search(colors, k + 1, nb)
-            colors[v] = -1
+            frame[6] = k
+            self._assign(colors, v, k)
+            nb, src = self._bound(frame[4], k + 1)
+            return [k + 1, nb, src, None, 0, 0, -1]
+        return None
     
-    def solve(self):
-        start = time.time()
+    def _reset(self, bounds, symmetry=True):
+        self.bounds = make_bounds(bounds)
+        self.twin_of = [None] * self.n
+        self.twin_classes = 0
+        if symmetry:
+            self.twin_classes = len(self.graph.twins)
+            for twins in self.graph.twins:
+                for v in twins:
+                    self.twin_of[v] = twins
+        self.key_shift = len(self.bounds).bit_length()
+        self.bound_cuts = {b.name: 0 for b in self.bounds}
         self.nodes = 0
         self.cut = 0
-        self.cache = {}
-        
+        self.cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_evictions = 0
+        self.class_masks = [0] * self.n
+        self.uncolored = (1 << self.n) - 1
+        self.workers = []
+        self.repaired = None
+    
+    def _start(self, initial=None):
+        # Начальная раскраска, нижняя оценка и кадр корня поиска.
+        # initial - прошлая раскраска: после починки она становится начальным рекордом,
+        # если не хуже жадной
         init = self._upper_bound()
+        self.repaired = None
+        if initial is not None:
+            warm, self.repaired = self.graph.repair_coloring(initial)
+            if max(warm, default=-1) <= max(init):
+                init = warm
         self.best_k = max(init) + 1
         self.best = init
         
-        all_vertices = list(range(self.n))
-        bound = self._clique_bound(all_vertices)
-        colors = [-1] * self.n
-        self._search(colors, 0, bound)
+        bound, source = self._bound(self.uncolored, 0)
+        # Граница в корне считается по всему графу, поэтому это доказанная нижняя оценка
+        self.lower_bound = max(bound, DegreeCliqueBound().compute(self.masks, self.uncolored))
+        self.colors = [-1] * self.n
+        self.tracker = SaturationTracker(self.graph, degree_weight=2)
+        return [0, bound, source, None, 0, 0, -1]
+    
+    @cached_solve
+    def solve(self, bounds="greedy", time_limit=None, node_limit=None, initial=None, symmetry=True):
+        # bounds - имя границы из algorithms.bounds.BOUNDS, объект или их список.
+        # При исчерпании time_limit (сек) или node_limit возвращается лучшая раскраска,
+        # найденная к этому моменту. initial - раскраска для тёплого старта, см. _start.
+        # symmetry - отсекать перестановки цветов близнецов (см. Graph.twins)
+        start = time.time()
+        budget = Budget(time_limit, node_limit)
+        self._reset(bounds, symmetry)
+        root = self._start(initial)
+        # Рекорд уже равен нижней оценке - искать нечего
+        self.completed = self.best_k <= self.lower_bound or run(root, self._search, budget)
+        self.tracker = None
+        
+        self.time = time.time() - start
+        return self.best, self.best_k
+    
+    def _split(self, frame):
+        # Обход верхних уровней дерева: узел глубины split_depth не раскрывается,
+        # а становится подзадачей для процесса-исполнителя
+        if frame[3] is None and self.n - self.uncolored.bit_count() >= self.split_depth:
+            self.tasks.append((self.colors.copy(), frame[:3]))
+            return None
+        return self._search(frame)
+    
+    def _resume(self, colors, frame, budget):
+        # Поиск в поддереве с уже раскрашенными вершинами colors.
+        # Кэш границ остаётся от прошлых подзадач, счётчики - нет
+        start = time.time()
+        self.nodes = 0
+        self.cut = 0
+        self.bound_cuts = {b.name: 0 for b in self.bounds}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_evictions = 0
+        self.class_masks = [0] * self.n
+        self.uncolored = (1 << self.n) - 1
+        self.colors = [-1] * self.n
+        self.tracker = SaturationTracker(self.graph, degree_weight=2)
+        for v, c in enumerate(colors):
+            if c != -1:
+                self._assign(self.colors, v, c)
+        self.best = None
+        self.best_k = budget.shared_k.value
+        completed = run(frame + [None, 0, 0, -1], self._search, budget)
+        self.tracker = None
+        self.time = time.time() - start
+        return completed
+    
+    def solve_parallel(self, workers=None, split_depth=None, bounds="greedy", time_limit=None, symmetry=True):
+        # Дерево поиска режется на глубине split_depth, поддеревья решаются в пуле
+        # процессов, рекорд best_k у процессов общий. Без split_depth глубина
+        # подбирается так, чтобы на процесс приходилось несколько подзадач:
+        # верх дерева DSatur узкий, и неглубокий разрез даёт одну огромную подзадачу
+        start = time.time()
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1:
+            return self.solve(bounds, time_limit, symmetry=symmetry)
+        deadline = None if time_limit is None else start + time_limit
+        depth = split_depth or 1
+        while True:
+            self._reset(bounds, symmetry)
+            self.split_depth = depth
+            self.tasks = []
+            # Разрез укладывается в оставшееся время; не успели - без процессов,
+            # от найденного при разрезе рекорда
+            remaining = None if deadline is None else max(0.0, deadline - time.time())
+            budget = Budget(remaining)
+            self.completed = run(self._start(), self._split, budget)
+            self.tracker = None
+            if budget.exhausted:
+                self.tasks = []
+                remaining = None if deadline is None else max(0.0, deadline - time.time())
+                colors, num = self.solve(bounds, remaining, initial=self.best, symmetry=symmetry)
+                self.time = time.time() - start
+                return colors, num
+            if split_depth or not self.tasks or len(self.tasks) >= 4 * workers or depth >= self.n:
+                break
+            depth += 1
+        
+        ctx = multiprocessing.get_context()
+        shared_k = ctx.RawValue("i", self.best_k)
+        lock = ctx.Lock()
+        counter = ctx.RawValue("i", 0)
+        tasks = [(colors, frame, deadline) for colors, frame in self.tasks]
+        self.tasks = []
+        per_worker = {}
+        if tasks:
+            initargs = (self.graph, bounds, symmetry, self.cache_limit, shared_k, lock, counter)
+            with ProcessPoolExecutor(min(workers, len(tasks)), mp_context=ctx,
+                                     initializer=_init_worker, initargs=initargs) as pool:
+                # Подзадачи раздаются по одной, ответы приходят в порядке обхода дерева
+                for index, best, completed, stats in pool.map(_solve_subproblem, tasks):
+                    self.completed = self.completed and completed
+                    if best is not None and max(best) + 1 < self.best_k:
+                        self.best_k = max(best) + 1
+                        self.best = best
+                    self.nodes += stats["nodes"]
+                    self.cut += stats["cuts"]
+                    self.cache_hits += stats["cache_hits"]
+                    self.cache_misses += stats["cache_misses"]
+                    self.cache_evictions += stats["cache_evictions"]
+                    for name, cnt in stats["bound_cuts"].items():
+                        self.bound_cuts[name] += cnt
+                    worker = per_worker.setdefault(index, {"worker": index, "subproblems": 0, "nodes": 0, "cuts": 0})
+                    worker["subproblems"] += 1
+                    worker["nodes"] += stats["nodes"]
+                    worker["cuts"] += stats["cuts"]
+        self.workers = [per_worker[i] for i in sorted(per_worker)]
         
         self.time = time.time() - start
         return self.best, self.best_k
     
+    @cached_statistics
     def get_statistics(self):
         return {
             "nodes": self.nodes,
             "cuts": self.cut,
             "cache_size": len(self.cache),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_evictions": self.cache_evictions,
+            "bound_cuts": dict(self.bound_cuts),
+            "twin_classes": self.twin_classes,
+            **gap_statistics(self.best_k, self.lower_bound),
+            "completed": self.completed,
+            "workers": [dict(w) for w in self.workers],
+            "repaired": self.repaired,
             "time": round(self.time, 3)
         }
\ No newline at end of file
@@ -1,46 +1,48 @@
 import time
+from algorithms.bounds import gap_statistics
+from algorithms.engine import Budget, run
+from algorithms.saturation import SaturationTracker
+from algorithms.cache import cached_solve, cached_statistics
 
 class BrownAlgorithm:
     def __init__(self, graph):
         self.graph = graph
         self.n = graph.n
         self.adj = graph.adj
+        self.masks = [graph.neighbor_mask(v) for v in range(self.n)]
+        self.class_masks = [0] * self.n
+        self.tracker = None
+        self.colors = None
         self.best = None
         self.best_k = self.n
         self.nodes = 0
         self.clique = []
+        self.completed = False
+        self.repaired = None
+        # twin_of[v] - класс близнецов вершины v (None - близнецов нет)
+        self.twin_of = [None] * self.n
+        self.twin_classes = 0
     
     def _find_clique(self):
-        order = []
-        for i in range(self.n):
-            order.append((self.graph.degree(i), i))
-        order.sort(reverse=True)
-        
         clique = []
-        for deg, v in order:
-            ok = True
-            for u in clique:
-                if not self.adj[v][u]:
-                    ok = False
-                    break
-            if ok:
+        clique_mask = 0
+        for v in self.graph.largest_first:
+            if clique_mask & self.masks[v] == clique_mask:
                 clique.append(v)
+                clique_mask |= 1 << v
         return clique
     
     def _bound(self, remaining, colors):
         if not remaining:
             return 0
-        used_colors = 0
-        for i in range(self.n):
-            if colors[i] != -1:
-                used_colors += 1
+        used_colors = self.n - colors.count(-1)
         
+        rest = 0
+        for v in remaining:
+            rest |= 1 << v
         max_deg = 0
         for v in remaining:
-            cnt = 0
-            for u in remaining:
-                if v != u and self.adj[v][u]:
-                    cnt += 1
+            cnt = (self.masks[v] & rest).bit_count()
             if cnt > max_deg:
                 max_deg = cnt
         
@@ -50,12 +52,16 @@ class BrownAlgorithm:
         return max(b1, b2, b3)
     
     def _select(self, colors):
+        # Во время поиска оценки поддерживает трекер, полный перебор - для вызова извне
+        if self.tracker is not None:
+            return self.tracker.select()
+        neighbor_lists = self.graph.neighbor_lists
         best = -1
         best_score = -1
         for v in range(self.n):
             if colors[v] == -1:
                 cnt = 0
-                for u in self.graph.neighbors(v):
+                for u in neighbor_lists[v]:
                     if colors[u] != -1:
                         cnt += 1
                 if cnt > best_score:
@@ -63,52 +69,98 @@ class BrownAlgorithm:
                     best = v
         return best
     
-    def _search(self, colors, k, bound):
-        self.nodes += 1
-        if k + bound >= self.best_k:
-            return
-        
-        v = self._select(colors)
-        if v == -1:
-            if k < self.best_k:
-                self.best_k = k
-                self.best = colors.copy()
-            return
-        
-        remaining = []
-        for i in range(self.n):
-            if colors[i] == -1 and i != v:
-                remaining.append(i)
-        
-        forbidden = set()
-        for u in self.graph.neighbors(v):
-            if colors[u] != -1:
-                forbidden.add(colors[u])
+    def _assign(self, colors, v, c):
+        colors[v] = c
+        self.class_masks[c] |= 1 << v
+        self.tracker.assign(v)
+    
+    def _unassign(self, colors, v, c):
+        self.tracker.unassign(v)
+        self.class_masks[c] ^= 1 << v
+        colors[v] = -1
+    
+    def _search(self, frame):
+        # Шаг поиска для algorithms.engine.run.
+        # Кадр: [k, bound, v, remaining, next_c, active], v is None - узел ещё не открыт,
+        # active - цвет, с которым v ушла в дочерний узел (-1, если такого нет)
+        colors = self.colors
+        k = frame[0]
+        bound = frame[1]
+        v = frame[2]
+        if v is None:
+            self.nodes += 1
+            if k + bound >= self.best_k:
+                return None
+            
+            v = self._select(colors)
+            if v == -1:
+                if k < self.best_k:
+                    self.best_k = k
+                    self.best = colors.copy()
+                return None
+            
+            remaining = []
+            for i in range(self.n):
+                if colors[i] == -1 and i != v:
+                    remaining.append(i)
+            frame[2] = v
+            frame[3] = remaining
+            # Цвет v больше цветов уже окрашенных близнецов, см. BranchBoundSolver._search
+            twins = self.twin_of[v]
+            if twins is not None:
+                frame[4] = max(colors[u] for u in twins) + 1
+        else:
+            c = frame[5]
+            self._unassign(colors, v, c)
+            frame[5] = -1
+            if c == k or self.best_k == bound:
+                return None
         
-        for c in range(k):
-            if c not in forbidden:
-                colors[v] = c
-                nb = self._bound(remaining, colors)
-                self._search(colors, k, nb)
-                colors[v] = -1
-                if self.best_k == bound:
-                    return
+        nv = self.masks[v]
+        class_masks = self.class_masks
+        c = frame[4]
+        while c < k:
+            if not nv & class_masks[c]:
+                frame[4] = c + 1
+                frame[5] = c
+                self._assign(colors, v, c)
+                return [k, self._bound(frame[3], colors), None, None, 0, -1]
+            c += 1
         
+        frame[4] = k + 1
         if k + 1 < self.best_k:
-            colors[v] = k
-            nb = self._bound(remaining, colors)
-            self._search(colors, k + 1, nb)
-            colors[v] = -1
+            frame[5] = k
+            self._assign(colors, v, k)
+            return [k + 1, self._bound(frame[3], colors), None, None, 0, -1]
+        return None
     
-    def solve(self):
+    @cached_solve
+    def solve(self, time_limit=None, node_limit=None, initial=None, symmetry=True):
+        # При исчерпании time_limit (сек) или node_limit возвращается лучшая раскраска,
+        # найденная к этому моменту. initial - прошлая раскраска: после починки
+        # она становится начальным рекордом. symmetry - отсекать перестановки
+        # цветов близнецов (см. Graph.twins)
         start = time.time()
+        budget = Budget(time_limit, node_limit)
         self.nodes = 0
+        self.twin_of = [None] * self.n
+        self.twin_classes = 0
+        if symmetry:
+            self.twin_classes = len(self.graph.twins)
+            for twins in self.graph.twins:
+                for v in twins:
+                    self.twin_of[v] = twins
+        # Близнец смежен со всеми соседями другого близнеца, поэтому жадная клика
+        # берёт класс близнецов целиком или не берёт совсем
         self.clique = self._find_clique()
         bound = len(self.clique)
     
         colors = [-1] * self.n
+        self.colors = colors
+        self.class_masks = [0] * self.n
+        self.tracker = SaturationTracker(self.graph)
         for i, v in enumerate(self.clique):
-            colors[v] = i
+            self._assign(colors, v, i)
     
         remaining = []
         for i in range(self.n):
@@ -117,11 +169,22 @@ class BrownAlgorithm:
     
         self.best = None
         self.best_k = self.n
+        self.repaired = None
+        if initial is not None:
+            self.best, self.repaired = self.graph.repair_coloring(initial)
+            self.best_k = max(self.best, default=-1) + 1
     
-        self._search(colors, bound, self._bound(remaining, colors))
+        # Рекорд уже равен размеру клики - искать нечего
+        self.completed = self.best_k <= bound or run([bound, self._bound(remaining, colors), None, None, 0, -1],
+                                                     self._search, budget)
+        self.tracker = None
     
         # Если не нашли решение, возвращаем хотя бы жадное
-        if self.best is None:
+        if self.best is None and not self.completed:
+            from algorithms.branch_bound import BranchBoundSolver
+            self.best = BranchBoundSolver(self.graph)._upper_bound()
+            self.best_k = max(self.best) + 1
+        elif self.best is None:
             from algorithms.branch_bound import BranchBoundSolver
             fallback = BranchBoundSolver(self.graph)
             self.best, self.best_k = fallback.solve()
@@ -129,9 +192,14 @@ class BrownAlgorithm:
         self.time = time.time() - start
         return self.best, self.best_k
     
+    @cached_statistics
     def get_statistics(self):
         return {
             "nodes": self.nodes,
             "clique_size": len(self.clique),
+            "twin_classes": self.twin_classes,
+            **gap_statistics(self.best_k, len(self.clique)),
+            "completed": self.completed,
+            "repaired": self.repaired,
             "time": round(self.time, 3)
         }
\ No newline at end of file
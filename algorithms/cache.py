@@ -0,0 +1,216 @@
+# Кэш решений на диске. Ключ - канонический хэш графа конфликтов (не зависит
+# от порядка занятий), имя решателя и его параметры, кроме IGNORED.
+# Решатели подключают кэш декораторами cached_solve и cached_statistics;
+# кэш включается для всех решателей сразу через set_default_cache
+import os
+import json
+import time
+import struct
+import hashlib
+import inspect
+import functools
+from array import array
+
+# Лимиты в ключ не входят: законченный поиск даёт тот же ответ при любом лимите.
+# Начальная раскраска тоже: она только ускоряет поиск
+IGNORED = ("time_limit", "node_limit", "initial")
+
+_default = None
+
+
+def _stable(value):
+    """Объект в параметрах (например, граница) входит в ключ именем класса и
+    параметрами конструктора: repr содержит адрес в памяти и меняется от запуска к запуску"""
+    params = {}
+    for name, param in inspect.signature(type(value)).parameters.items():
+        if param.kind not in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+            params[name] = getattr(value, name, None)
+    return [type(value).__qualname__, params]
+
+
+def set_default_cache(cache):
+    """Кэш, к которому обращаются solve() всех решателей; None - отключить"""
+    global _default
+    _default = cache
+
+
+def default_cache():
+    return _default
+
+
+class SolutionCache:
+    """Раскраски, найденные решателями: по файлу JSON на запись в каталоге path.
+    Суммарный размер записей не больше max_bytes - при переполнении удаляются те,
+    к которым дольше всего не обращались"""
+    VERSION = 1
+
+    def __init__(self, path, max_bytes=64 << 20):
+        if max_bytes < 0:
+            raise ValueError("Размер кэша не может быть отрицательным")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _labels(graph):
+        # Занятие целиком: по таким меткам вершины упорядочиваются канонически
+        table = graph.table
+        strings = table.strings
+        labels = []
+        for v in range(graph.n):
+            groups = [strings[g] for g in table.group_ids[table.group_offsets[v]:table.group_offsets[v+1]]]
+            label = [table.lesson_id(v), strings[table.subject[v]], strings[table.type[v]], groups,
+                     strings[table.teacher[v]], strings[table.classroom[v]], table.hours[v], table.instance[v]]
+            labels.append(json.dumps(label, ensure_ascii=False, default=str))
+        return labels
+
+    def key(self, graph, solver, options):
+        """Ключ записи и канонический порядок вершин: order[i] - вершина на i-м месте.
+        Одинаковые занятия взаимозаменяемы (у них одни и те же соседи),
+        поэтому порядок среди них на хэш не влияет"""
+        labels = self._labels(graph)
+        order = sorted(range(graph.n), key=labels.__getitem__)
+        position = [0] * graph.n
+        for i, v in enumerate(order):
+            position[v] = i
+        digest = hashlib.sha256(f"v{self.VERSION} {solver} ".encode())
+        digest.update(json.dumps(options, sort_keys=True, default=_stable).encode())
+        for v in order:
+            label = labels[v].encode()
+            row = array("i", sorted(position[u] for u in graph.neighbor_lists[v])).tobytes()
+            digest.update(struct.pack("<II", len(label), len(row)))
+            digest.update(label)
+            digest.update(row)
+        return digest.hexdigest(), order
+
+    def _file(self, key):
+        return os.path.join(self.path, key + ".json")
+
+    def _read(self, key):
+        try:
+            with open(self._file(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # Повреждённая запись - как будто её нет
+            self._remove(key)
+            return None
+
+    def _remove(self, key):
+        try:
+            os.remove(self._file(key))
+        except OSError:
+            pass
+
+    def get(self, graph, key, order):
+        """Запись по ключу с раскраской в текущем порядке вершин или None.
+        Поиск, прерванный лимитом, из кэша не отдаётся - его стоит повторить"""
+        record = self._read(key)
+        if record is None or not (record["completed"] or record["optimal"]):
+            self.misses += 1
+            return None
+        colors = [-1] * graph.n
+        if len(record["colors"]) == graph.n:
+            for i, c in enumerate(record["colors"]):
+                colors[order[i]] = c
+        # Запись проверяется: раскраска должна быть правильной для этого графа
+        if -1 in colors or not all(graph.is_safe(v, colors[v], colors) for v in range(graph.n)):
+            self._remove(key)
+            self.misses += 1
+            return None
+        # Время обращения - для вытеснения давно не используемых записей
+        os.utime(self._file(key))
+        self.hits += 1
+        record["colors"] = colors
+        return record
+
+    def put(self, key, order, colors, num_colors, stats):
+        old = self._read(key)
+        if old is not None and old["num_colors"] < num_colors:
+            return
+        record = {
+            "colors": [colors[v] for v in order],
+            "num_colors": num_colors,
+            "optimal": stats["optimal"],
+            "completed": stats["completed"],
+            "stats": stats,
+        }
+        tmp = self._file(key) + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(tmp, self._file(key))
+        self.stores += 1
+        self._evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.path):
+            if name.endswith(".json"):
+                info = os.stat(os.path.join(self.path, name))
+                entries.append((info.st_mtime, info.st_size, name[:-5]))
+        return entries
+
+    def _evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(key)
+            total -= size
+            self.evictions += 1
+
+    def get_statistics(self):
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries)
+        }
+
+
+def cached_solve(solve):
+    """solve() решателя через кэш по умолчанию: при попадании поиск не запускается"""
+    signature = inspect.signature(solve)
+
+    @functools.wraps(solve)
+    def wrapper(self, *args, **kwargs):
+        self._cached_stats = None
+        cache = _default
+        if cache is None:
+            return solve(self, *args, **kwargs)
+        start = time.time()
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        options = {name: value for name, value in bound.arguments.items()
+                   if name != "self" and name not in IGNORED}
+        key, order = cache.key(self.graph, type(self).__name__, options)
+        record = cache.get(self.graph, key, order)
+        if record is not None:
+            self.best = record["colors"]
+            self.best_k = record["num_colors"]
+            self._cached_stats = dict(record["stats"], cached=True, time=round(time.time() - start, 3))
+            return self.best, self.best_k
+        colors, num = solve(self, *args, **kwargs)
+        cache.put(key, order, colors, num, self.get_statistics())
+        return colors, num
+    return wrapper
+
+
+def cached_statistics(get_statistics):
+    """get_statistics() решателя: при попадании в кэш - статистика сохранённого решения"""
+    @functools.wraps(get_statistics)
+    def wrapper(self):
+        if getattr(self, "_cached_stats", None) is not None:
+            return dict(self._cached_stats)
+        return dict(get_statistics(self), cached=False)
+    return wrapper
@@ -0,0 +1,110 @@
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from algorithms.bounds import gap_statistics
+from algorithms.portfolio import SOLVERS
+
+# Состояние процесса-исполнителя параллельного режима
+_worker = {}
+
+
+def _init_worker(graph, name, options):
+    _worker.update(graph=graph, name=name, options=options)
+
+
+def _solve_component(task):
+    index, vertices, initial, deadline = task
+    return index, _solve(_worker["graph"], vertices, _worker["name"], _worker["options"], initial, deadline)
+
+
+def _solve(graph, vertices, name, options, initial, deadline):
+    start = time.time()
+    if len(vertices) == 1:
+        # Одиночная вершина: решатель не нужен
+        return [0], 1, {"lower_bound": 1, "gap": 0, "optimal": True, "completed": True, "time": 0.0}
+    solver = SOLVERS[name](graph.subgraph(vertices))
+    options = dict(options)
+    if deadline is not None:
+        options["time_limit"] = max(0, deadline - start)
+    if initial is not None:
+        options["initial"] = initial
+    colors, num = solver.solve(**options)
+    stats = solver.get_statistics()
+    stats["time"] = round(time.time() - start, 3)
+    return colors, num, stats
+
+
+class ComponentSolver:
+    """Решение по компонентам связности графа конфликтов: компоненты не делят
+    ни групп, ни преподавателей, ни аудиторий, поэтому раскрашиваются независимо.
+    Число цветов - максимум по компонентам"""
+
+    def __init__(self, graph, solver="branch_bound"):
+        if solver not in SOLVERS:
+            raise ValueError(f"Неизвестный решатель: {solver}")
+        self.graph = graph
+        self.n = graph.n
+        self.solver = solver
+        self.best = None
+        self.best_k = self.n
+        self.components = []
+        self.lower_bound = 0
+        self.completed = False
+        self.time = 0
+
+    def solve(self, time_limit=None, workers=1, initial=None, **options):
+        # options передаются решателю каждой компоненты (например, bounds или node_limit).
+        # time_limit - общий лимит: компонента получает остаток времени до общего срока.
+        # workers > 1 - компоненты решаются параллельно в пуле процессов.
+        # initial - раскраска всего графа для тёплого старта, режется по компонентам
+        start = time.time()
+        deadline = None if time_limit is None else start + time_limit
+        parts = self.graph.components()
+        # Крупные компоненты первыми: их поиск самый долгий
+        order = sorted(range(len(parts)), key=lambda i: -len(parts[i]))
+        tasks = []
+        for i in order:
+            part_initial = None if initial is None else [initial[v] for v in parts[i]]
+            tasks.append((i, parts[i], part_initial, deadline))
+
+        results = {}
+        heavy = [task for task in tasks if len(task[1]) > 1]
+        if workers > 1 and len(heavy) > 1:
+            ctx = multiprocessing.get_context()
+            with ProcessPoolExecutor(min(workers, len(heavy)), mp_context=ctx, initializer=_init_worker,
+                                     initargs=(self.graph, self.solver, options)) as pool:
+                for index, result in pool.map(_solve_component, heavy):
+                    results[index] = result
+        for index, vertices, part_initial, part_deadline in tasks:
+            if index not in results:
+                results[index] = _solve(self.graph, vertices, self.solver, options, part_initial, part_deadline)
+
+        # Раскраски компонент не пересекаются по вершинам и берут цвета с нуля
+        self.best = [-1] * self.n
+        self.components = []
+        for i, vertices in enumerate(parts):
+            colors, num, stats = results[i]
+            for v, c in zip(vertices, colors):
+                self.best[v] = c
+            self.components.append({
+                "vertices": len(vertices),
+                "colors": num,
+                "lower_bound": stats["lower_bound"],
+                "optimal": stats["optimal"],
+                "completed": stats["completed"],
+                "time": stats["time"],
+            })
+        self.best_k = max((c["colors"] for c in self.components), default=0)
+        self.lower_bound = max((c["lower_bound"] for c in self.components), default=0)
+        self.completed = all(c["completed"] for c in self.components)
+        self.time = time.time() - start
+        return self.best, self.best_k
+
+    def get_statistics(self):
+        return {
+            "solver": self.solver,
+            "components": [dict(c) for c in self.components],
+            **gap_statistics(self.best_k, self.lower_bound),
+            "completed": self.completed,
+            "time": round(self.time, 3)
+        }
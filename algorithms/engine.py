@@ -0,0 +1,106 @@
+# Выполнение рекурсивного поиска на явном стеке вместо стека вызовов Python.
+# Узел поиска - кадр (список), который решатель сам заводит и разбирает.
+# step(frame) продвигает верхний кадр: возвращает кадр дочернего узла,
+# который нужно обойти следующим, или None, если узел исчерпан.
+# Порядок обхода совпадает с рекурсивным, глубина ограничена только памятью.
+import time
+
+
+class Budget:
+    """Ограничение поиска по времени (секунды) и/или числу узлов"""
+    # Часы опрашиваются не на каждом узле, а раз в CHECK_EVERY узлов
+    CHECK_EVERY = 256
+
+    def __init__(self, time_limit=None, node_limit=None):
+        if time_limit is not None and time_limit < 0:
+            raise ValueError("Лимит времени не может быть отрицательным")
+        if node_limit is not None and node_limit < 0:
+            raise ValueError("Лимит узлов не может быть отрицательным")
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.deadline = None if time_limit is None else time.time() + time_limit
+        self.nodes = 0
+        self.exhausted = False
+
+    def expired(self):
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            self.exhausted = True
+        elif self.deadline is not None and time.time() >= self.deadline:
+            self.exhausted = True
+        return self.exhausted
+
+
+def _checkpoint(budget):
+    # Общая для run и walk проверка бюджета перед открытием очередного кадра.
+    # Возвращает, сколько кадров открыть до следующей проверки часов,
+    # или None, если бюджет исчерпан
+    if budget.expired():
+        return None
+    check = budget.CHECK_EVERY - 1
+    if budget.node_limit is not None:
+        check = min(check, budget.node_limit - budget.nodes - 1)
+    return check
+
+
+def run(root, step, budget=None):
+    # Возвращает True, если поиск пройден до конца, и False, если его прервал бюджет
+    stack = [root]
+    push = stack.append
+    pop = stack.pop
+    if budget is None:
+        while stack:
+            child = step(stack[-1])
+            if child is None:
+                pop()
+            else:
+                push(child)
+        return True
+
+    # Узлом считается каждый открытый кадр, включая корень
+    check = _checkpoint(budget)
+    if check is None:
+        return False
+    budget.nodes += 1
+    while stack:
+        child = step(stack[-1])
+        if child is None:
+            pop()
+            continue
+        check -= 1
+        if check < 0:
+            check = _checkpoint(budget)
+            if check is None:
+                return False
+        push(child)
+        budget.nodes += 1
+    return True
+
+
+def walk(root, step, budget=None):
+    # Тот же обход, что и run, но генератором: управление возвращается вызывающему
+    # после каждого шага, поэтому результаты, которые step складывает по пути,
+    # можно забирать сразу. Итог (True/False, как у run) - значение StopIteration
+    stack = [root]
+    push = stack.append
+    pop = stack.pop
+    check = 0
+    if budget is not None:
+        check = _checkpoint(budget)
+        if check is None:
+            return False
+        budget.nodes += 1
+    while stack:
+        child = step(stack[-1])
+        yield
+        if child is None:
+            pop()
+            continue
+        if budget is not None:
+            check -= 1
+            if check < 0:
+                check = _checkpoint(budget)
+                if check is None:
+                    return False
+            budget.nodes += 1
+        push(child)
+    return True
@@ -0,0 +1,379 @@
+import time
+import heapq
+import random
+from array import array
+from algorithms.bounds import gap_statistics
+from algorithms.engine import Budget
+
+# Быстрые эвристики для больших графов: не доказывают оптимальность, но дают
+# раскраску за O(m log n) (DSatur), O(k m) (RLF) или за отведённое время (TabuCol).
+# Работают со списками соседей, без битовых масок, поэтому годятся и для
+# десятков тысяч вершин. Результат - начальный рекорд для точных решателей (initial=)
+
+
+def greedy_coloring(graph, order=None):
+    """Жадная раскраска в порядке order (по умолчанию "наибольшие первыми"):
+    вершина получает наименьший цвет, не занятый соседями"""
+    colors = [-1] * graph.n
+    neighbor_lists = graph.neighbor_lists
+    for v in graph.largest_first if order is None else order:
+        used = {colors[u] for u in neighbor_lists[v]}
+        c = 0
+        while c in used:
+            c += 1
+        colors[v] = c
+    return colors
+
+
+def greedy_clique(graph):
+    """Клика для нижней оценки: занятия с общим ресурсом (группой, преподавателем
+    или аудиторией) попарно конфликтуют, поэтому начало - самая загруженная корзина
+    ресурса; затем жадно добавляются общие соседи наибольшей степени.
+    Из двух клик (от корзины и от вершины наибольшей степени) берётся большая.
+    Рёбра графа могут не совпадать с ресурсами (Graph.from_edges), поэтому
+    из корзины берутся только попарно смежные по neighbor_lists вершины"""
+    if not graph.n:
+        return []
+    table = graph.table
+    buckets = {}
+    for v in range(graph.n):
+        for key in table.resources(v):
+            # Занятия с равным ключом не конфликтуют - в клику идёт одно из них
+            buckets.setdefault(key, {}).setdefault(table.same_key(v), v)
+    busiest = max(buckets.values(), key=len)
+    degrees = graph.degrees
+    seed = []
+    common = None
+    for v in sorted(busiest.values(), key=lambda u: (-degrees[u], u)):
+        if common is None or v in common:
+            seed.append(v)
+            neighbors = set(graph.neighbor_lists[v])
+            common = neighbors if common is None else common & neighbors
+    return max(_extend_clique(graph, seed),
+               _extend_clique(graph, [graph.largest_first[0]]), key=len)
+
+
+def _extend_clique(graph, clique):
+    degrees = graph.degrees
+    candidates = set(graph.neighbor_lists[clique[0]])
+    for v in clique[1:]:
+        candidates.intersection_update(graph.neighbor_lists[v])
+    while candidates:
+        v = max(candidates, key=lambda u: (degrees[u], -u))
+        clique.append(v)
+        candidates.intersection_update(graph.neighbor_lists[v])
+    return clique
+
+
+class DSaturSolver:
+    """DSatur: следующей красится вершина с наибольшим числом различных цветов
+    у соседей (насыщенностью), при равенстве - наибольшей степени"""
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.n = graph.n
+        self.best = None
+        self.best_k = self.n
+        self.lower_bound = 0
+        self.time = 0
+
+    def solve(self):
+        start = time.time()
+        n = self.n
+        neighbor_lists = self.graph.neighbor_lists
+        degrees = self.graph.degrees
+        colors = [-1] * n
+        # Цвета соседей - битовая маска; у окрашенной вершины все биты (-1),
+        # поэтому её соседи в цикле ниже отсеиваются той же проверкой
+        seen = [0] * n
+        saturation = [0] * n
+        # Корзины по насыщенности, в корзине - куча по степени. Ключ упакован в одно
+        # число, как в SaturationTracker: -(степень * n + n - 1 - v); сравнение чисел
+        # дешевле сравнения кортежей, а кучи корзин мельче одной общей.
+        # Записи вершины в корзинах ниже её насыщенности устарели и пропускаются
+        keys = [-(degrees[v] * n + n - 1 - v) for v in range(n)]
+        buckets = [list(keys)]
+        heapq.heapify(buckets[0])
+        pop = heapq.heappop
+        push = heapq.heappush
+        top = 0
+        left = n
+        while left:
+            bucket = buckets[top]
+            if not bucket:
+                top -= 1
+                continue
+            v = n - 1 - -pop(bucket) % n
+            if saturation[v] != top:
+                continue
+            saturation[v] = -1
+            left -= 1
+            used = seen[v]
+            seen[v] = -1
+            # Наименьший свободный цвет - младший нулевой бит маски
+            c = (~used & (used + 1)).bit_length() - 1
+            colors[v] = c
+            bit = 1 << c
+            for u in neighbor_lists[v]:
+                if not seen[u] & bit:
+                    seen[u] |= bit
+                    s = saturation[u] + 1
+                    saturation[u] = s
+                    if s > top:
+                        top = s
+                        if s == len(buckets):
+                            buckets.append([])
+                    push(buckets[s], keys[u])
+        self.best = colors
+        self.best_k = max(colors, default=-1) + 1
+        self.lower_bound = len(greedy_clique(self.graph))
+        self.time = time.time() - start
+        return self.best, self.best_k
+
+    def get_statistics(self):
+        return {
+            **gap_statistics(self.best_k, self.lower_bound),
+            "completed": self.best_k == self.lower_bound,
+            "time": round(self.time, 3)
+        }
+
+
+class RLFSolver:
+    """Recursive Largest First (Лейтон): цветовые классы строятся по одному.
+    Класс начинается с вершины наибольшей степени среди неокрашенных, затем
+    добавляется кандидат (несмежный с классом) с наибольшим числом соседей среди
+    исключённых (смежных с классом), при равенстве - с наименьшим числом соседей
+    среди кандидатов"""
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.n = graph.n
+        self.best = None
+        self.best_k = self.n
+        self.lower_bound = 0
+        self.time = 0
+
+    def solve(self):
+        start = time.time()
+        n = self.n
+        neighbor_lists = self.graph.neighbor_lists
+        colors = [-1] * n
+        # Степени в подграфе неокрашенных вершин
+        rest_degree = array("i", self.graph.degrees)
+        uncolored = list(range(n))
+        # Ключ кучи - одно число (меньше - лучше): сначала больше исключённых соседей,
+        # затем меньше соседей-кандидатов, затем меньший номер
+        top = self.graph.max_degree
+        width = (top + 1) * n
+        pop = heapq.heappop
+        push = heapq.heappush
+        excluded_nb = array("i", [0]) * n
+        candidate_nb = array("i", [0]) * n
+        c = 0
+        while uncolored:
+            # Кандидаты - неокрашенные вершины, несмежные с классом c
+            candidate = bytearray(n)
+            for v in uncolored:
+                candidate[v] = 1
+                excluded_nb[v] = 0
+                candidate_nb[v] = rest_degree[v]
+            v = max(uncolored, key=lambda u: (rest_degree[u], -u))
+            # Устаревшие записи кучи (счётчики уже изменились) пропускаются
+            heap = [top * width + rest_degree[u] * n + u for u in uncolored]
+            heapq.heapify(heap)
+            while True:
+                colors[v] = c
+                candidate[v] = 0
+                moved = [u for u in neighbor_lists[v] if candidate[u]]
+                # Соседи v смежны с классом: из кандидатов в исключённые
+                for u in moved:
+                    candidate[u] = 0
+                # Ключ вершины, задетой несколькими перенесёнными соседями,
+                # кладётся в кучу один раз
+                touched = set()
+                for u in moved:
+                    for w in neighbor_lists[u]:
+                        if candidate[w]:
+                            excluded_nb[w] += 1
+                            candidate_nb[w] -= 1
+                            touched.add(w)
+                for w in touched:
+                    push(heap, (top - excluded_nb[w]) * width + candidate_nb[w] * n + w)
+                v = -1
+                while heap:
+                    key = pop(heap)
+                    w = key % n
+                    if candidate[w] and key == (top - excluded_nb[w]) * width + candidate_nb[w] * n + w:
+                        v = w
+                        break
+                if v == -1:
+                    break
+            left = []
+            for v in uncolored:
+                if colors[v] == c:
+                    for u in neighbor_lists[v]:
+                        rest_degree[u] -= 1
+                else:
+                    left.append(v)
+            uncolored = left
+            c += 1
+        self.best = colors
+        self.best_k = c
+        self.lower_bound = len(greedy_clique(self.graph))
+        self.time = time.time() - start
+        return self.best, self.best_k
+
+    def get_statistics(self):
+        return {
+            **gap_statistics(self.best_k, self.lower_bound),
+            "completed": self.best_k == self.lower_bound,
+            "time": round(self.time, 3)
+        }
+
+
+class TabuColSolver:
+    """TabuCol (Херц, де Верра): раскраска в k цветов с конфликтами, за ход одна
+    конфликтная вершина меняет цвет на лучший не запрещённый; возврат к старому
+    цвету запрещён на tenure ходов. Найдя раскраску без конфликтов, поиск
+    пробует k - 1. Начальная раскраска - DSatur или initial"""
+    # Запрет: случайная часть плюс доля от числа конфликтных вершин
+    TENURE_RANDOM = 10
+    TENURE_FACTOR = 0.6
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.n = graph.n
+        self.best = None
+        self.best_k = self.n
+        self.lower_bound = 0
+        self.iterations = 0
+        self.improvements = 0
+        self.completed = False
+        self.repaired = None
+        self.time = 0
+
+    def _reduce(self, colors, k):
+        # Вершины цвета k переносятся в цвет 0..k-1 с наименьшим числом соседей
+        neighbor_lists = self.graph.neighbor_lists
+        colors = list(colors)
+        for v in range(self.n):
+            if colors[v] >= k:
+                count = [0] * k
+                for u in neighbor_lists[v]:
+                    if colors[u] < k:
+                        count[colors[u]] += 1
+                colors[v] = count.index(min(count))
+        return colors
+
+    def _tabu_search(self, colors, k, budget, rng):
+        # Возвращает раскраску без конфликтов или None, если бюджет кончился раньше
+        n = self.n
+        neighbor_lists = self.graph.neighbor_lists
+        # gamma[v][c] - число соседей v цвета c
+        gamma = [array("i", [0]) * k for _ in range(n)]
+        for v in range(n):
+            g = gamma[v]
+            for u in neighbor_lists[v]:
+                g[colors[u]] += 1
+        conflicting = {v for v in range(n) if gamma[v][colors[v]]}
+        conflicts = sum(gamma[v][colors[v]] for v in conflicting) // 2
+        best_conflicts = conflicts
+        # tabu[v * k + c] - до какой итерации v нельзя вернуть цвет c
+        tabu = {}
+        it = 0
+        while conflicts:
+            if budget.expired():
+                return None
+            budget.nodes += 1
+            it += 1
+            best_delta = None
+            moves = []
+            for v in conflicting:
+                cv = colors[v]
+                g = gamma[v]
+                base = g[cv]
+                for c in range(k):
+                    if c == cv:
+                        continue
+                    delta = g[c] - base
+                    if best_delta is not None and delta > best_delta:
+                        continue
+                    # Запрет снимается, если ход даёт лучший результат за поиск
+                    if tabu.get(v * k + c, 0) > it and conflicts + delta >= best_conflicts:
+                        continue
+                    if best_delta is None or delta < best_delta:
+                        best_delta = delta
+                        moves = []
+                    moves.append((v, c))
+            if not moves:
+                continue
+            v, c = moves[rng.randrange(len(moves))]
+            old = colors[v]
+            colors[v] = c
+            for u in neighbor_lists[v]:
+                g = gamma[u]
+                g[old] -= 1
+                g[c] += 1
+                cu = colors[u]
+                if cu == old and not g[old]:
+                    conflicting.discard(u)
+                elif cu == c and g[c] == 1:
+                    conflicting.add(u)
+            if gamma[v][c]:
+                conflicting.add(v)
+            else:
+                conflicting.discard(v)
+            conflicts += best_delta
+            if conflicts < best_conflicts:
+                best_conflicts = conflicts
+            tabu[v * k + old] = it + int(self.TENURE_FACTOR * len(conflicting)) + rng.randrange(self.TENURE_RANDOM)
+        return colors
+
+    def solve(self, time_limit=None, iterations=10000, initial=None, seed=0):
+        # time_limit (сек) и iterations - общий бюджет по всем k; по его исчерпании
+        # возвращается лучшая найденная раскраска без конфликтов.
+        # initial - раскраска для старта (чинится), иначе DSatur.
+        # Без обоих лимитов поиск для недостижимого k не остановился бы
+        if time_limit is None and iterations is None:
+            raise ValueError("Нужен лимит времени или числа итераций")
+        start = time.time()
+        budget = Budget(time_limit, iterations)
+        rng = random.Random(seed)
+        self.repaired = None
+        if initial is not None:
+            self.best, self.repaired = self.graph.repair_coloring(initial)
+        else:
+            self.best = DSaturSolver(self.graph).solve()[0]
+        self.best_k = max(self.best, default=-1) + 1
+        self.lower_bound = len(greedy_clique(self.graph))
+        self.improvements = 0
+        k = self.best_k - 1
+        while k >= self.lower_bound and k > 0:
+            colors = self._tabu_search(self._reduce(self.best, k), k, budget, rng)
+            if colors is None:
+                break
+            self.best = colors
+            self.best_k = k
+            self.improvements += 1
+            k -= 1
+        self.iterations = budget.nodes
+        self.completed = self.best_k == self.lower_bound
+        self.time = time.time() - start
+        return self.best, self.best_k
+
+    def get_statistics(self):
+        return {
+            "iterations": self.iterations,
+            "improvements": self.improvements,
+            **gap_statistics(self.best_k, self.lower_bound),
+            "completed": self.completed,
+            "repaired": self.repaired,
+            "time": round(self.time, 3)
+        }
+
+
+HEURISTICS = {
+    "dsatur": DSaturSolver,
+    "rlf": RLFSolver,
+    "tabucol": TabuColSolver,
+}
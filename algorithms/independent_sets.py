@@ -1,135 +1,384 @@
+import sys
 import time
+import heapq
+from models import mask_of
+from algorithms.bounds import DegreeCliqueBound, gap_statistics
+from algorithms.engine import Budget, run, walk
+from algorithms.cache import cached_solve, cached_statistics
+from algorithms.heuristics import greedy_coloring
 
 class IndependentSetSolver:
+    COVERS = ("exact", "ordered")
+    ORDERINGS = (None, "degeneracy")
+
     def __init__(self, graph):
         self.graph = graph
         self.n = graph.n
         self.adj = graph.adj
+        self.masks = [graph.neighbor_mask(v) for v in range(self.n)]
         self.best = None
         self.best_k = self.n
         self.sets = []
+        self.set_masks = []
+        self.found = []
+        self.sets_found = 0
+        self.discarded = 0
+        self.peak_memory = 0
+        self.colors = None
+        self.containing = []
+        self.max_set = 0
+        self.covered = 0
+        self.full = (1 << self.n) - 1
         self.combinations = 0
         self.pruned = 0
+        self.lower_bound = 0
+        self.completed = False
+        self.enumerated = False
+        self._stream = None
+        self.repaired = None
     
     def _upper_bound(self):
-        colors = [-1] * self.n
-        order = []
-        for i in range(self.n):
-            order.append((self.graph.degree(i), i))
-        order.sort(reverse=True)
-        
-        for deg, v in order:
-            used = []
-            for u in self.graph.neighbors(v):
-                if colors[u] != -1:
-                    used.append(colors[u])
-            used_set = set(used)
-            c = 0
-            while c in used_set:
-                c += 1
-            colors[v] = c
-        return colors
+        return greedy_coloring(self.graph)
     
-    def _bron_kerbosch(self, r, p, x):
-        if not p and not x:
-            self.sets.append(list(r))
-            return
-        if not p:
-            return
+    def _bron_kerbosch(self, frame):
+        # Шаг перебора для algorithms.engine.run, множества - битовые маски.
+        # Кадр: [r, p, x, cand, active], cand is None - вызов ещё не начат,
+        # active - вершина, ушедшая в дочерний вызов
+        masks = self.masks
+        r = frame[0]
+        p = frame[1]
+        x = frame[2]
+        cand = frame[3]
+        if cand is None:
+            if not p:
+                if not x:
+                    self.found.append(r)
+                return None
+            # Опорная вершина по Томите: больше всего соседей в P,
+            # ветвимся только по вершинам P вне её окрестности
+            pivot_count = -1
+            rest = p | x
+            while rest:
+                low = rest & -rest
+                u = low.bit_length() - 1
+                rest ^= low
+                cnt = (p & masks[u]).bit_count()
+                if cnt > pivot_count:
+                    pivot_count = cnt
+                    pivot = u
+            cand = p & ~masks[pivot]
+        else:
+            low = 1 << frame[4]
+            p ^= low
+            x |= low
         
-        pivot_set = set()
-        for e in p:
-            pivot_set.add(e)
-        for e in x:
-            pivot_set.add(e)
-        pivot = list(pivot_set)[0] if pivot_set else None
-        
-        p_list = list(p)
-        for v in p_list:
-            if pivot and self.adj[v][pivot]:
+        while cand:
+            low = cand & -cand
+            v = low.bit_length() - 1
+            cand ^= low
+            nv = masks[v]
+            new_p = p & nv
+            new_x = x & nv
+            if not new_p:
+                # Листовой вызов разбираем на месте, не заводя для него кадр
+                if not new_x:
+                    self.found.append(r + [v])
+                p ^= low
+                x |= low
                 continue
-            
-            new_r = r.copy()
-            new_r.add(v)
-            
-            new_p = set()
-            for u in p:
-                if self.adj[v][u]:
-                    new_p.add(u)
-            
-            new_x = set()
-            for u in x:
-                if self.adj[v][u]:
-                    new_x.add(u)
-            
-            self._bron_kerbosch(new_r, new_p, new_x)
-            p.remove(v)
-            x.add(v)
+            frame[1] = p
+            frame[2] = x
+            frame[3] = cand
+            frame[4] = v
+            return [r + [v], new_p, new_x, None, None]
+        return None
     
-    def _find_sets(self):
+    def _iter_sets(self, budget=None, ordering=None):
+        # Максимальные множества по одному, по мере нахождения, вершины по возрастанию.
+        # ordering="degeneracy" - верхний уровень перебирается в порядке вырожденности:
+        # у вершины v в P остаются только соседи, идущие после неё, и глубина
+        # перебора ограничена вырожденностью графа. None - обычный вызов от корня.
+        # Когда генератор исчерпан, self.enumerated - пройден ли перебор до конца
+        if ordering == "degeneracy":
+            roots = []
+            later = self.full
+            # Вершины снимаются в порядке, обратном "наименьшим последним"
+            for v in reversed(self.graph.smallest_last):
+                later ^= 1 << v
+                nv = self.masks[v]
+                roots.append([[v], nv & later, nv & ~later, None, None])
+        elif ordering is None:
+            roots = [[[], self.full, 0, None, None]]
+        else:
+            self._check(ordering)
+        
+        found = self.found = []
+        self.enumerated = True
+        for root in roots:
+            walker = walk(root, self._bron_kerbosch, budget)
+            done = None
+            while done is None:
+                try:
+                    next(walker)
+                except StopIteration as stop:
+                    done = stop.value
+                while found:
+                    current = found.pop()
+                    current.sort()
+                    yield current
+            if not done:
+                self.enumerated = False
+                return
+    
+    def _check(self, ordering=None, top_k=None, score="size"):
+        if ordering not in self.ORDERINGS:
+            raise ValueError(f"Неизвестный порядок перебора: {ordering}")
+        if top_k is not None and top_k < 1:
+            raise ValueError("top_k должен быть положительным")
+        self._score(score)
+    
+    def _score(self, score):
+        if score == "size":
+            return lambda current: len(current)
+        if score == "coverage":
+            # Сколько конфликтов снимает множество: трудные занятия ценнее
+            degrees = self.graph.degrees
+            return lambda current: sum(degrees[v] + 1 for v in current)
+        raise ValueError(f"Неизвестная оценка множеств: {score}")
+    
+    def _stream_sets(self, budget=None, ordering=None, top_k=None, score="size"):
+        # Множества по одному, в self.sets и self.set_masks, в том порядке, в каком
+        # их получает покрытие. Без top_k - сразу по мере нахождения; top_k - потоковый
+        # режим: хранятся только top_k лучших по оценке score множеств (куча, худшее
+        # на вершине), остальные отбрасываются сразу, а лучшие отдаются после перебора
+        self._check(ordering, top_k, score)
+        score_of = self._score(score)
         self.sets = []
-        all_vertices = set(range(self.n))
-        self._bron_kerbosch(set(), all_vertices, set())
-        self.sets.sort(key=len, reverse=True)
+        self.set_masks = []
+        self.sets_found = 0
+        self.discarded = 0
+        self.peak_memory = 0
+        kept = []
+        held = 0
+        for current in self._iter_sets(budget, ordering):
+            self.sets_found += 1
+            mask = mask_of(current)
+            if top_k is None:
+                entry = (score_of(current), None, current, mask)
+            else:
+                # При равной оценке вытесняется множество, идущее позже в итоговом порядке
+                entry = (score_of(current), [-v for v in current], current, mask)
+            held += self._entry_size(entry)
+            if top_k is None:
+                self.sets.append(current)
+                self.set_masks.append(mask)
+                yield current
+            elif len(kept) < top_k:
+                heapq.heappush(kept, entry)
+            else:
+                dropped = heapq.heappushpop(kept, entry)
+                held -= self._entry_size(dropped)
+                self.discarded += 1
+            if held > self.peak_memory:
+                self.peak_memory = held
+        
+        kept.sort(key=lambda entry: (-entry[0], entry[2]))
+        for entry in kept:
+            self.sets.append(entry[2])
+            self.set_masks.append(entry[3])
+            yield entry[2]
+    
+    def _find_sets(self, budget=None, ordering=None, top_k=None, score="size"):
+        # Все множества сразу (для точного покрытия), по убыванию оценки score
+        for _ in self._stream_sets(budget, ordering, top_k, score):
+            pass
+        # Порядок множеств не зависит от порядка перебора
+        score_of = self._score(score)
+        order = sorted(range(len(self.sets)), key=lambda i: (-score_of(self.sets[i]), self.sets[i]))
+        self.sets = [self.sets[i] for i in order]
+        self.set_masks = [self.set_masks[i] for i in order]
         return self.sets
     
-    def _cover(self, colors, used, idx):
-        self.combinations += 1
-        if used >= self.best_k:
-            self.pruned += 1
-            return False
-        
-        all_done = True
-        for i in range(self.n):
-            if colors[i] == -1:
-                all_done = False
-                break
-        if all_done:
-            if used < self.best_k:
-                self.best_k = used
-                self.best = colors.copy()
-            return True
-        
-        if idx >= len(self.sets):
-            return False
-        
-        current = self.sets[idx]
-        can_use = True
-        for v in current:
-            if colors[v] != -1:
-                can_use = False
-                break
+    def _has_set(self, idx):
+        # Покрытие берёт множества по требованию: недостающее - из потока перебора
+        while idx >= len(self.sets) and self._stream is not None:
+            if next(self._stream, None) is None:
+                self._stream = None
+        return idx < len(self.sets)
+    
+    @staticmethod
+    def _entry_size(entry):
+        # Оценка памяти под хранимое множество: список вершин, маска и ключ кучи
+        size = sys.getsizeof(entry[2]) + sys.getsizeof(entry[3])
+        if entry[1] is not None:
+            size += sys.getsizeof(entry[1])
+        return size
+    
+    def _cover(self, frame):
+        # Шаг перебора для algorithms.engine.run.
+        # Кадр: [used, idx, state]; state 0 - вход, 1 - вернулись из ветки с набором idx,
+        # 2 - вернулись из ветки без него
+        colors = self.colors
+        used = frame[0]
+        idx = frame[1]
+        state = frame[2]
+        if state == 0:
+            self.combinations += 1
+            if used >= self.best_k:
+                self.pruned += 1
+                return None
+            
+            if self.covered == self.full:
+                if used < self.best_k:
+                    self.best_k = used
+                    self.best = colors.copy()
+                return None
+            
+            if not self._has_set(idx):
+                return None
+            
+            current_mask = self.set_masks[idx]
+            if not current_mask & self.covered:
+                for v in self.sets[idx]:
+                    colors[v] = used
+                self.covered |= current_mask
+                frame[2] = 1
+                return [used + 1, idx + 1, 0]
+        elif state == 1:
+            self.covered ^= self.set_masks[idx]
+            for v in self.sets[idx]:
+                colors[v] = -1
+        else:
+            return None
         
-        if can_use:
-            for v in current:
-                colors[v] = used
-            self._cover(colors, used + 1, idx + 1)
-            for v in current:
+        frame[2] = 2
+        return [used, idx + 1, 0]
+    
+    def _exact_cover(self, frame):
+        # Точное покрытие по схеме алгоритма X: ветвимся по вершине, которую
+        # покрывает меньше всего ещё допустимых множеств, и отсекаем ветку, если
+        # оставшиеся вершины не уместить в best_k - used множеств максимального размера.
+        # Кадр: [used, options, pos, active]; options is None - узел ещё не открыт,
+        # active - номер множества, с которым ушли в дочерний узел
+        colors = self.colors
+        used = frame[0]
+        options = frame[1]
+        if options is None:
+            self.combinations += 1
+            covered = self.covered
+            if covered == self.full:
+                if used < self.best_k:
+                    self.best_k = used
+                    self.best = colors.copy()
+                return None
+            
+            rest = (self.full ^ covered).bit_count()
+            if used + -(-rest // self.max_set) >= self.best_k:
+                self.pruned += 1
+                return None
+            
+            set_masks = self.set_masks
+            options = None
+            uncovered = self.full ^ covered
+            while uncovered:
+                low = uncovered & -uncovered
+                uncovered ^= low
+                current = [idx for idx in self.containing[low.bit_length() - 1]
+                           if not set_masks[idx] & covered]
+                if options is None or len(current) < len(options):
+                    options = current
+                    if len(options) <= 1:
+                        break
+            if not options:
+                # Вершину уже нечем покрыть
+                return None
+            frame[1] = options
+        else:
+            idx = frame[3]
+            self.covered ^= self.set_masks[idx]
+            for v in self.sets[idx]:
                 colors[v] = -1
         
-        self._cover(colors, used, idx + 1)
-        return False
+        pos = frame[2]
+        if pos >= len(options) or used + 1 >= self.best_k:
+            return None
+        idx = options[pos]
+        frame[2] = pos + 1
+        frame[3] = idx
+        for v in self.sets[idx]:
+            colors[v] = used
+        self.covered |= self.set_masks[idx]
+        return [used + 1, None, 0, -1]
     
-    def solve(self):
+    @cached_solve
+    def solve(self, time_limit=None, node_limit=None, ordering=None, top_k=None, score="size",
+              cover="exact", initial=None):
+        # Бюджет общий на перечисление множеств и покрытие. При его исчерпании
+        # возвращается лучшая раскраска, найденная к этому моменту.
+        # ordering - порядок верхнего уровня перечисления, см. _iter_sets;
+        # top_k и score - потоковый режим с ограниченной памятью, см. _find_sets;
+        # cover - "exact" (_exact_cover) или "ordered" (_cover, перебор по порядку множеств);
+        # initial - прошлая раскраска: после починки она становится начальным рекордом,
+        # если не хуже жадной
+        if cover not in self.COVERS:
+            raise ValueError(f"Неизвестный способ покрытия: {cover}")
+        self._check(ordering, top_k, score)
         start = time.time()
+        budget = Budget(time_limit, node_limit)
         self.combinations = 0
         self.pruned = 0
         
         init = self._upper_bound()
+        self.repaired = None
+        if initial is not None:
+            warm, self.repaired = self.graph.repair_coloring(initial)
+            if max(warm, default=-1) <= max(init):
+                init = warm
         self.best_k = max(init) + 1
         self.best = init
+        self.lower_bound = DegreeCliqueBound().compute(self.masks, self.full)
         
-        self._find_sets()
-        colors = [-1] * self.n
-        self._cover(colors, 0, 0)
+        self.covered = 0
+        self.colors = [-1] * self.n
+        if self.best_k <= self.lower_bound:
+            # Рекорд уже равен нижней оценке - искать нечего
+            self.sets, self.set_masks = [], []
+            self.sets_found = self.discarded = self.peak_memory = 0
+            self.completed = True
+        elif cover == "exact":
+            # Ветвление по наименее покрытой вершине требует всех множеств сразу;
+            # по неполному списку множеств покрытие не строим
+            self._find_sets(budget, ordering, top_k, score)
+            self.completed = self.enumerated
+            if self.completed:
+                self.containing = [[] for _ in range(self.n)]
+                for idx, current in enumerate(self.sets):
+                    for v in current:
+                        self.containing[v].append(idx)
+                self.max_set = max((len(current) for current in self.sets), default=1)
+                self.completed = run([0, None, 0, -1], self._exact_cover, budget)
+        else:
+            # Упорядоченное покрытие запрашивает множества по одному, перебор
+            # продвигается только по мере надобности
+            self._stream = self._stream_sets(budget, ordering, top_k, score)
+            completed = run([0, 0, 0], self._cover, budget)
+            self._stream = None
+            self.completed = completed and self.enumerated
         
         self.time = time.time() - start
         return self.best, self.best_k
     
+    @cached_statistics
     def get_statistics(self):
         return {
-            "sets_found": len(self.sets),
+            "sets_found": self.sets_found,
+            "sets_kept": len(self.sets),
+            "sets_discarded": self.discarded,
+            "peak_memory": self.peak_memory,
             "combinations": self.combinations,
             "pruned": self.pruned,
+            **gap_statistics(self.best_k, self.lower_bound),
+            "completed": self.completed,
+            "repaired": self.repaired,
             "time": round(self.time, 3)
         }
\ No newline at end of file
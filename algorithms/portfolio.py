@@ -0,0 +1,117 @@
+import time
+import multiprocessing
+from queue import Empty
+from algorithms.branch_bound import BranchBoundSolver
+from algorithms.brown import BrownAlgorithm
+from algorithms.independent_sets import IndependentSetSolver
+
+SOLVERS = {
+    "branch_bound": BranchBoundSolver,
+    "brown": BrownAlgorithm,
+    "independent": IndependentSetSolver,
+}
+
+
+def _race(name, graph, time_limit, initial, results):
+    solver = SOLVERS[name](graph)
+    colors, num = solver.solve(time_limit=time_limit, initial=initial)
+    results.put((name, colors, num, solver.get_statistics()))
+
+
+class PortfolioSolver:
+    """Параллельный запуск нескольких решателей: ответ берётся у первого,
+    доказавшего оптимальность, или лучший к концу бюджета"""
+    # Запас на запуск процессов и передачу ответа сверх лимита времени
+    GRACE = 1.0
+    # Как часто проверять, не завершился ли процесс без ответа
+    POLL = 0.1
+
+    def __init__(self, graph, solvers=None):
+        names = list(solvers or SOLVERS)
+        for name in names:
+            if name not in SOLVERS:
+                raise ValueError(f"Неизвестный решатель: {name}")
+        self.graph = graph
+        self.n = graph.n
+        self.names = names
+        self.best = None
+        self.best_k = self.n
+        self.winner = None
+        self.optimal = False
+        self.results = {}
+        self.cancelled = []
+
+    def solve(self, time_limit=None, initial=None):
+        # initial - прошлая раскраска для тёплого старта всех решателей
+        start = time.time()
+        self.best = None
+        self.best_k = self.n
+        self.winner = None
+        self.results = {}
+        ctx = multiprocessing.get_context()
+        results = ctx.Queue()
+        procs = {}
+        for name in self.names:
+            procs[name] = ctx.Process(target=_race, args=(name, self.graph, time_limit, initial, results), daemon=True)
+            procs[name].start()
+
+        deadline = None if time_limit is None else start + time_limit + self.GRACE
+        pending = set(self.names)
+        self.optimal = False
+        while pending and not self.optimal:
+            if deadline is not None and time.time() >= deadline:
+                break
+            try:
+                name, colors, num, stats = results.get(timeout=self.POLL)
+            except Empty:
+                # Процесс, упавший без ответа, больше не ждём
+                for name in list(pending):
+                    if not procs[name].is_alive() and procs[name].exitcode != 0:
+                        pending.discard(name)
+                continue
+            pending.discard(name)
+            valid = self._is_valid(colors, num)
+            self.results[name] = {"colors": num, "optimal": stats["optimal"] and valid,
+                                  "valid": valid, "time": stats["time"]}
+            # Неправильную раскраску не принимаем и по ней не останавливаемся
+            if not valid:
+                continue
+            if self.best is None or num < self.best_k:
+                self.best = colors
+                self.best_k = num
+                self.winner = name
+            self.optimal = stats["optimal"]
+
+        # Оставшиеся решатели больше не нужны. Завершаем все живые процессы:
+        # ответивший процесс может висеть на отправке непрочитанного ответа
+        self.cancelled = sorted(pending)
+        for proc in procs.values():
+            if proc.is_alive():
+                proc.terminate()
+            proc.join()
+        results.close()
+
+        # Никто не успел ответить - возвращаем хотя бы жадную раскраску
+        if self.best is None:
+            self.best = BranchBoundSolver(self.graph)._upper_bound()
+            self.best_k = max(self.best) + 1
+        self.time = time.time() - start
+        return self.best, self.best_k
+
+    def _is_valid(self, colors, num):
+        """Раскраска задаёт цвет каждой вершине, соседи различаются,
+        а число цветов совпадает с заявленным"""
+        if colors is None or len(colors) != self.n:
+            return False
+        if any(c < 0 for c in colors) or (self.n and max(colors) + 1 != num):
+            return False
+        return all(self.graph.is_safe(v, colors[v], colors) for v in range(self.n))
+
+    def get_statistics(self):
+        return {
+            "winner": self.winner,
+            "optimal": self.optimal,
+            "results": {name: dict(res) for name, res in self.results.items()},
+            "cancelled": list(self.cancelled),
+            "time": round(self.time, 3)
+        }
@@ -0,0 +1,124 @@
+import time
+from models import iter_bits
+from algorithms.bounds import DegreeCliqueBound, gap_statistics
+from algorithms.branch_bound import BranchBoundSolver
+from algorithms.portfolio import SOLVERS
+
+# Правила сокращения графа перед точным поиском (lower - нижняя оценка, клика):
+# PEEL - степень вершины меньше lower: в конце ей всегда хватит одного из lower цветов;
+# DOMINATED - соседи вершины v входят в соседи несмежной с ней вершины u:
+# v можно дать цвет u. Вершины возвращаются в обратном порядке снятия,
+# поэтому к моменту раскраски v все её оставшиеся тогда соседи (и u) уже покрашены
+PEEL = 0
+DOMINATED = 1
+
+
+def reduce_graph(graph, lower):
+    """Ядро графа после правил PEEL и DOMINATED, применяемых до неподвижной точки.
+    Возвращает (маска ядра, снятые вершины [(v, правило, u)] в порядке снятия)"""
+    masks = [graph.neighbor_mask(v) for v in range(graph.n)]
+    alive = (1 << graph.n) - 1
+    removed = []
+    changed = True
+    while changed:
+        changed = False
+        for v in iter_bits(alive):
+            nv = masks[v] & alive
+            if nv.bit_count() < lower:
+                alive ^= 1 << v
+                removed.append((v, PEEL, -1))
+                changed = True
+                continue
+            # Доминирующая вершина смежна со всеми соседями v, в частности
+            # с соседом наименьшей степени - кандидаты берутся из его окрестности
+            w = min(iter_bits(nv), key=lambda u: (masks[u] & alive).bit_count())
+            candidates = masks[w] & alive & ~nv & ~(1 << v)
+            for u in iter_bits(candidates):
+                if not nv & ~masks[u]:
+                    alive ^= 1 << v
+                    removed.append((v, DOMINATED, u))
+                    changed = True
+                    break
+    return alive, removed
+
+
+def extend_coloring(graph, colors, removed):
+    """Раскраска ядра colors (-1 вне ядра) дополняется снятыми вершинами"""
+    for v, rule, u in reversed(removed):
+        if rule == DOMINATED:
+            colors[v] = colors[u]
+        else:
+            used = {colors[w] for w in graph.neighbor_lists[v]}
+            c = 0
+            while c in used:
+                c += 1
+            colors[v] = c
+    return colors
+
+
+class ReducedSolver:
+    """Точный решатель на ядре графа: вершины, которые раскрашиваются
+    без поиска (см. PEEL и DOMINATED), снимаются заранее и докрашиваются в конце"""
+
+    def __init__(self, graph, solver="branch_bound"):
+        if solver not in SOLVERS:
+            raise ValueError(f"Неизвестный решатель: {solver}")
+        self.graph = graph
+        self.n = graph.n
+        self.solver = solver
+        self.best = None
+        self.best_k = self.n
+        self.kernel = []
+        self.peeled = 0
+        self.dominated = 0
+        self.lower_bound = 0
+        self.completed = False
+        self.kernel_stats = {}
+        self.reduction_time = 0
+        self.time = 0
+
+    def solve(self, initial=None, **options):
+        # options передаются решателю ядра (time_limit, node_limit, bounds и т.д.),
+        # initial - раскраска всего графа для тёплого старта, на ядро берётся её часть
+        start = time.time()
+        masks = [self.graph.neighbor_mask(v) for v in range(self.n)]
+        self.lower_bound = DegreeCliqueBound().compute(masks, (1 << self.n) - 1)
+        alive, removed = reduce_graph(self.graph, self.lower_bound)
+        self.kernel = list(iter_bits(alive))
+        self.peeled = sum(1 for _, rule, _ in removed if rule == PEEL)
+        self.dominated = len(removed) - self.peeled
+        self.reduction_time = time.time() - start
+
+        colors = [-1] * self.n
+        self.kernel_stats = {}
+        self.completed = True
+        if self.kernel:
+            solver = SOLVERS[self.solver](self.graph.subgraph(self.kernel))
+            if initial is None:
+                # Жадная раскраска ядра бывает хуже жадной раскраски всего графа,
+                # поэтому решатель ядра стартует с лучшей из них
+                initial = BranchBoundSolver(self.graph)._upper_bound()
+            options["initial"] = [initial[v] for v in self.kernel]
+            kernel_colors, _ = solver.solve(**options)
+            self.kernel_stats = solver.get_statistics()
+            self.completed = self.kernel_stats["completed"]
+            self.lower_bound = max(self.lower_bound, self.kernel_stats["lower_bound"])
+            for v, c in zip(self.kernel, kernel_colors):
+                colors[v] = c
+        self.best = extend_coloring(self.graph, colors, removed)
+        self.best_k = max(self.best, default=-1) + 1
+        self.time = time.time() - start
+        return self.best, self.best_k
+
+    def get_statistics(self):
+        return {
+            "solver": self.solver,
+            "kernel_size": len(self.kernel),
+            "peeled": self.peeled,
+            "dominated": self.dominated,
+            "reduction_time": round(self.reduction_time, 3),
+            "kernel": dict(self.kernel_stats),
+            **gap_statistics(self.best_k, self.lower_bound),
+            "completed": self.completed,
+            "time": round(self.time, 3)
+        }
@@ -0,0 +1,92 @@
+class SaturationTracker:
+    # Инкрементальный учёт окрашенных соседей для выбора вершины в стиле DSatur.
+    # Оценка вершины: degree_weight * степень + число окрашенных соседей,
+    # при равенстве выигрывает меньший номер - как в полном переборе _select.
+    # Максимум хранится в турнирном дереве, выбор вершины - чтение корня.
+    def __init__(self, graph, degree_weight=0):
+        self.n = graph.n
+        n = self.n
+        self.neighbors = graph.neighbor_lists
+        # Оценка и номер упакованы в одно число: старшая часть - оценка,
+        # младшая - (n - 1 - v); новый окрашенный сосед прибавляет ровно n
+        degrees = graph.degrees
+        self.keys = [degree_weight * degrees[v] * n + (n - 1 - v) for v in range(n)]
+        self.start_keys = list(self.keys)
+        self.colored = [False] * n
+        
+        self.size = 1
+        while self.size < n:
+            self.size *= 2
+        self.tree = [-1] * (2 * self.size)
+        self.tree[self.size:self.size + n] = self.keys
+        for i in range(self.size - 1, 0, -1):
+            self.tree[i] = max(self.tree[2 * i], self.tree[2 * i + 1])
+    
+    def _update(self, v, value):
+        # Ключи уникальны, поэтому подъём к корню останавливается,
+        # как только предок перестаёт зависеть от этого листа
+        tree = self.tree
+        i = self.size + v
+        old = tree[i]
+        tree[i] = value
+        i >>= 1
+        if value > old:
+            while i and tree[i] < value:
+                tree[i] = value
+                i >>= 1
+        else:
+            while i and tree[i] == old:
+                left = tree[2 * i]
+                right = tree[2 * i + 1]
+                tree[i] = left if left > right else right
+                i >>= 1
+    
+    def assign(self, v):
+        self.colored[v] = True
+        self._update(v, -1)
+        # Тот же подъём, что и в _update, развёрнут в цикле: это горячий путь поиска
+        n = self.n
+        tree = self.tree
+        size = self.size
+        keys = self.keys
+        colored = self.colored
+        for u in self.neighbors[v]:
+            key = keys[u] + n
+            keys[u] = key
+            if not colored[u]:
+                i = size + u
+                tree[i] = key
+                i >>= 1
+                while i and tree[i] < key:
+                    tree[i] = key
+                    i >>= 1
+    
+    def unassign(self, v):
+        n = self.n
+        tree = self.tree
+        size = self.size
+        keys = self.keys
+        colored = self.colored
+        for u in self.neighbors[v]:
+            old = keys[u]
+            keys[u] = old - n
+            if not colored[u]:
+                i = size + u
+                tree[i] = old - n
+                i >>= 1
+                while i and tree[i] == old:
+                    left = tree[2 * i]
+                    right = tree[2 * i + 1]
+                    tree[i] = left if left > right else right
+                    i >>= 1
+        colored[v] = False
+        self._update(v, keys[v])
+    
+    def colored_neighbors(self, v):
+        return (self.keys[v] - self.start_keys[v]) // self.n
+    
+    def select(self):
+        top = self.tree[1] if self.n else -1
+        if top < 0:
+            return -1
+        return self.n - 1 - top % self.n
\ No newline at end of file
@@ -5,6 +5,21 @@ from models import Graph, Lesson, Group, Teacher, Classroom, Subject
 from algorithms.branch_bound import BranchBoundSolver
 from algorithms.independent_sets import IndependentSetSolver
 from algorithms.brown import BrownAlgorithm
+from algorithms.portfolio import PortfolioSolver
+from algorithms.decompose import ComponentSolver
+from algorithms.reduction import ReducedSolver
+from algorithms.heuristics import DSaturSolver, RLFSolver, TabuColSolver
+from algorithms.cache import SolutionCache, set_default_cache
+
+# Найденные раскраски сохраняются между запусками
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".solution_cache")
+
+# Точные решатели по пунктам меню 2-4: для запуска по компонентам и на ядре
+EXACT_SOLVERS = {
+    '2': ("Branch and Bound", "branch_bound"),
+    '3': ("Independent Sets", "independent"),
+    '4': ("Brown Algorithm", "brown")
+}
 
 def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -18,8 +33,24 @@ def print_menu():
     print("5. Сравнить все алгоритмы")
     print("6. Сохранить результат")
     print("7. Показать расписание")
+    print("8. Портфель: все алгоритмы параллельно")
+    print("9. Загрузить прошлое расписание для тёплого старта")
+    print("10. Решение по компонентам связности")
+    print("11. Решение на ядре графа (с сокращением)")
+    print("12. Быстрые эвристики (DSatur, RLF, TabuCol)")
     print("0. Выход")
 
+def ask_time_limit():
+    value = input("Лимит времени, сек (Enter - без лимита): ").strip()
+    if not value:
+        return None
+    try:
+        limit = float(value)
+    except ValueError:
+        print("Некорректный лимит, поиск без ограничения")
+        return None
+    return limit if limit >= 0 else None
+
 def show_schedule(graph, colors, algo_name):
     if not graph or not colors or -1 in colors:
         print("Расписание не рассчитано")
@@ -62,7 +93,10 @@ def show_schedule(graph, colors, algo_name):
 def main():
     graph = None
     colors = None
+    initial = None
     algo_name = ""
+    cache = SolutionCache(CACHE_DIR)
+    set_default_cache(cache)
     
     while True:
         clear_screen()
@@ -73,10 +107,16 @@ def main():
         
         if choice == '1':
             path = input("Укажите полный путь к JSON: ")
-            graph = Graph.load_from_json(path)
+            # Неизменившийся файл читается из снимка рядом с ним, без разбора JSON
+            graph = Graph.load_cached(path)
             if graph:
                 colors = None
+                initial = None
                 print("Загружено успешно")
+                stats = graph.load_stats
+                if stats and stats["time"]:
+                    print(f"Прочитано {stats['records']} записей за {stats['time']} с: "
+                          f"{stats['records_per_sec']} зап/с, {stats['bytes_per_sec'] / 1e6:.1f} МБ/с")
             else:
                 print("Ошибка загрузки")
             input("Enter...")
@@ -92,9 +132,10 @@ def main():
                 '4': ("Brown Algorithm", BrownAlgorithm)
             }
             algo_name, Solver = solvers[choice]
+            time_limit = ask_time_limit()
             solver = Solver(graph)
             start = time.time()
-            colors, num = solver.solve()
+            colors, num = solver.solve(time_limit=time_limit, initial=initial)
             elapsed = time.time() - start
             print(f"\n{algo_name}: {num} цветов за {elapsed:.3f} сек")
             stats = solver.get_statistics()
@@ -109,15 +150,29 @@ def main():
                 input("Enter...")
                 continue
             results = {}
+            time_limit = ask_time_limit()
             for name, Solver in [("BranchBound", BranchBoundSolver), 
                                 ("Independent", IndependentSetSolver),
                                 ("Brown", BrownAlgorithm)]:
                 solver = Solver(graph)
                 start = time.time()
-                c, n = solver.solve()
+                c, n = solver.solve(time_limit=time_limit, initial=initial)
                 elapsed = time.time() - start
                 results[name] = (n, elapsed)
-                print(f"{name}: {n} цветов, {elapsed:.3f} сек")
+                stats = solver.get_statistics()
+                if stats["optimal"]:
+                    status = "оптимально"
+                elif stats["gap"] is None:
+                    status = "ниже нижней оценки - ошибка"
+                else:
+                    status = f"разрыв {stats['gap']}"
+                if not stats["completed"]:
+                    status += ", прервано по лимиту"
+                if stats["cached"]:
+                    status += ", из кэша"
+                print(f"{name}: {n} цветов, {elapsed:.3f} сек ({status})")
+            cache_stats = cache.get_statistics()
+            print(f"Кэш решений: {cache_stats['hits']} попаданий, {cache_stats['misses']} промахов")
             input("Enter...")
             
         elif choice == '6':
@@ -136,6 +191,113 @@ def main():
                 print("Нет расписания")
             input("Enter...")
             
+        elif choice == '8':
+            if not graph:
+                print("Сначала загрузите данные")
+                input("Enter...")
+                continue
+            time_limit = ask_time_limit()
+            solver = PortfolioSolver(graph)
+            colors, num = solver.solve(time_limit=time_limit, initial=initial)
+            stats = solver.get_statistics()
+            algo_name = f"Portfolio ({stats['winner']})"
+            print(f"\n{algo_name}: {num} цветов за {stats['time']:.3f} сек")
+            for name, res in stats["results"].items():
+                print(f"{name}: {res['colors']} цветов, {res['time']:.3f} сек")
+            if stats["cancelled"]:
+                print(f"Остановлены: {', '.join(stats['cancelled'])}")
+            show_schedule(graph, colors, algo_name)
+            input("Enter...")
+            
+        elif choice == '9':
+            if not graph:
+                print("Сначала загрузите данные")
+                input("Enter...")
+                continue
+            path = input("Файл расписания (результат пункта 6): ")
+            loaded = graph.load_coloring(path)
+            if loaded is not None:
+                initial = loaded
+                known = sum(1 for c in initial if c != -1)
+                print(f"Прошлое расписание: {known} из {graph.n} занятий, решатели начнут с него")
+            input("Enter...")
+            
+        elif choice == '10':
+            if not graph:
+                print("Сначала загрузите данные")
+                input("Enter...")
+                continue
+            key = input("Решатель для компонент (2 - ветви и границы, 3 - независимые множества, 4 - Браун): ")
+            if key not in EXACT_SOLVERS:
+                print("Неверный выбор")
+                input("Enter...")
+                continue
+            name, solver_name = EXACT_SOLVERS[key]
+            time_limit = ask_time_limit()
+            solver = ComponentSolver(graph, solver_name)
+            colors, num = solver.solve(time_limit=time_limit, workers=os.cpu_count() or 1, initial=initial)
+            stats = solver.get_statistics()
+            algo_name = f"{name} по компонентам"
+            print(f"\n{algo_name}: {num} цветов за {stats['time']:.3f} сек, компонент: {len(stats['components'])}")
+            for i, part in enumerate(stats["components"]):
+                if part["vertices"] > 1:
+                    status = "оптимально" if part["optimal"] else ("полный поиск" if part["completed"] else "прервано")
+                    print(f"  [{i}] {part['vertices']} занятий: {part['colors']} цветов, {part['time']:.3f} сек ({status})")
+            show_schedule(graph, colors, algo_name)
+            input("Enter...")
+            
+        elif choice == '11':
+            if not graph:
+                print("Сначала загрузите данные")
+                input("Enter...")
+                continue
+            key = input("Решатель для ядра (2 - ветви и границы, 3 - независимые множества, 4 - Браун): ")
+            if key not in EXACT_SOLVERS:
+                print("Неверный выбор")
+                input("Enter...")
+                continue
+            name, solver_name = EXACT_SOLVERS[key]
+            time_limit = ask_time_limit()
+            solver = ReducedSolver(graph, solver_name)
+            colors, num = solver.solve(time_limit=time_limit, initial=initial)
+            stats = solver.get_statistics()
+            algo_name = f"{name} на ядре"
+            print(f"\n{algo_name}: {num} цветов за {stats['time']:.3f} сек")
+            print(f"Ядро: {stats['kernel_size']} из {graph.n} занятий "
+                  f"(снято по степени: {stats['peeled']}, доминируемых: {stats['dominated']}, "
+                  f"сокращение {stats['reduction_time']:.3f} сек)")
+            show_schedule(graph, colors, algo_name)
+            input("Enter...")
+            
+        elif choice == '12':
+            if not graph:
+                print("Сначала загрузите данные")
+                input("Enter...")
+                continue
+            solvers = {
+                '1': ("DSatur", DSaturSolver),
+                '2': ("RLF", RLFSolver),
+                '3': ("TabuCol", TabuColSolver)
+            }
+            key = input("Эвристика (1 - DSatur, 2 - RLF, 3 - TabuCol): ")
+            if key not in solvers:
+                print("Неверный выбор")
+                input("Enter...")
+                continue
+            algo_name, Solver = solvers[key]
+            solver = Solver(graph)
+            if Solver is TabuColSolver:
+                colors, num = solver.solve(time_limit=ask_time_limit(), initial=initial)
+            else:
+                colors, num = solver.solve()
+            stats = solver.get_statistics()
+            print(f"\n{algo_name}: {num} цветов за {stats['time']:.3f} сек, нижняя оценка {stats['lower_bound']}")
+            # Раскраска эвристики - начальный рекорд для точных решателей
+            initial = colors
+            print("Точные решатели начнут с этой раскраски")
+            show_schedule(graph, colors, algo_name)
+            input("Enter...")
+            
         elif choice == '0':
             sys.exit(0)
 
@@ -1,6 +1,21 @@
+import os
 import json
+import time
+import mmap
+import codecs
+import struct
+import hashlib
+from array import array
+from bisect import bisect_left, insort
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 class Group:
+    __slots__ = ("id", "name", "students")
+
     def __init__(self, id, name, students=0):
         self.id = id
         self.name = name
@@ -11,6 +26,8 @@ class Group:
     
 
 class Teacher:
+    __slots__ = ("id", "name", "department")
+
     def __init__(self, id, name, department=""):
         self.id = id
         self.name = name
@@ -21,6 +38,8 @@ class Teacher:
 
 
 class Classroom:
+    __slots__ = ("id", "name", "capacity", "room_type")
+
     def __init__(self, id, name, capacity=0, room_type="lecture"):
         self.id = id
         self.name = name
@@ -32,6 +51,8 @@ class Classroom:
     
 
 class Subject:
+    __slots__ = ("id", "name", "hours")
+
     def __init__(self, id, name, hours=0):
         self.id = id
         self.name = name
@@ -42,6 +63,8 @@ class Subject:
     
 
 class Lesson:
+    __slots__ = ("id", "subject", "type", "groups", "teacher", "classroom", "hours_per_week", "instance", "color")
+
     def __init__(self, id, subject, type, groups, teacher, classroom, hours_per_week, instance=0):
         self.id = id
         self.subject = subject
@@ -112,71 +135,1075 @@ def expand_lessons(lessons_data):
     return expanded
 
 
+class LessonTable:
+    """Занятия по столбцам: строки интернированы и заменены малыми целыми номерами,
+    объекты Lesson создаются только по запросу (для вывода и сохранения)"""
+    # Номер ресурса: 3 * код строки + вид (группа, преподаватель, аудитория)
+    GROUP, TEACHER, CLASSROOM = 0, 1, 2
+
+    def __init__(self, suffixed=False):
+        # suffixed - id занятия хранится без номера часа и собирается как f"{id}_{instance}"
+        self.suffixed = suffixed
+        self.strings = []
+        self.codes = {}
+        self.source = array("i")
+        self.subject = array("i")
+        self.type = array("i")
+        self.teacher = array("i")
+        self.classroom = array("i")
+        self.group_offsets = array("i", [0])
+        self.group_ids = array("i")
+        self.hours = array("i")
+        self.instance = array("i")
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+    def append(self, id, subject, type, groups, teacher, classroom, hours_per_week, instance=0):
+        code = self.code
+        self.source.append(code(id))
+        self.subject.append(code(subject))
+        self.type.append(code(type))
+        self.teacher.append(code(teacher))
+        self.classroom.append(code(classroom))
+        for g in groups if isinstance(groups, list) else [groups]:
+            self.group_ids.append(code(g))
+        self.group_offsets.append(len(self.group_ids))
+        self.hours.append(hours_per_week)
+        self.instance.append(instance)
+
+    @classmethod
+    def expand(cls, lessons_data):
+        """То же, что expand_lessons, но без объекта на каждый час"""
+        table = cls(suffixed=True)
+        for lesson in lessons_data:
+            table.expand_one(lesson)
+        return table
+
+    def expand_one(self, lesson):
+        """Добавить одно занятие из JSON, по строке на каждый час"""
+        hours = lesson.get('hours_per_week', 1)
+        for i in range(hours):
+            id = lesson['id'] if self.suffixed else f"{lesson['id']}_{i}"
+            self.append(id, lesson['subject'], lesson.get('type', 'lecture'), lesson['groups'],
+                        lesson['teacher'], lesson['classroom'], hours, i)
+
+    def rows_of(self, id):
+        """Строки всех часов занятия id (id - как в JSON, без номера часа)"""
+        if self.suffixed:
+            code = self.codes.get(id)
+            return [i for i, source in enumerate(self.source) if source == code]
+        return [i for i in range(len(self)) if self.lesson_id(i) == f"{id}_{self.instance[i]}"]
+
+    def set_row(self, i, subject, type, groups, teacher, classroom, hours_per_week):
+        code = self.code
+        self.subject[i] = code(subject)
+        self.type[i] = code(type)
+        self.teacher[i] = code(teacher)
+        self.classroom[i] = code(classroom)
+        self.hours[i] = hours_per_week
+        self._set_groups(i, [code(g) for g in (groups if isinstance(groups, list) else [groups])])
+
+    def _set_groups(self, i, codes):
+        start = self.group_offsets[i]
+        end = self.group_offsets[i+1]
+        self.group_ids[start:end] = array("i", codes)
+        delta = len(codes) - (end - start)
+        if delta:
+            offsets = self.group_offsets
+            for j in range(i + 1, len(offsets)):
+                offsets[j] += delta
+
+    def move(self, src, dst):
+        """Скопировать строку src на место dst"""
+        for column in (self.source, self.subject, self.type, self.teacher, self.classroom, self.hours, self.instance):
+            column[dst] = column[src]
+        self._set_groups(dst, self.group_ids[self.group_offsets[src]:self.group_offsets[src+1]])
+
+    def take(self, rows):
+        """Таблица из строк rows в этом порядке; пул строк общий с исходной таблицей"""
+        table = LessonTable(self.suffixed)
+        table.strings = self.strings
+        table.codes = self.codes
+        for name in ("source", "subject", "type", "teacher", "classroom", "hours", "instance"):
+            column = getattr(self, name)
+            setattr(table, name, array("i", [column[i] for i in rows]))
+        for i in rows:
+            table.group_ids.extend(self.group_ids[self.group_offsets[i]:self.group_offsets[i+1]])
+            table.group_offsets.append(len(table.group_ids))
+        return table
+
+    def pop(self):
+        """Удалить последнюю строку"""
+        for column in (self.source, self.subject, self.type, self.teacher, self.classroom, self.hours, self.instance):
+            column.pop()
+        del self.group_ids[self.group_offsets[-2]:]
+        self.group_offsets.pop()
+
+    @classmethod
+    def from_lessons(cls, lessons):
+        table = cls()
+        for lesson in lessons:
+            table.append(lesson.id, lesson.subject, lesson.type, lesson.groups,
+                         lesson.teacher, lesson.classroom, lesson.hours_per_week, lesson.instance)
+        return table
+
+    def __len__(self):
+        return len(self.source)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        strings = self.strings
+        groups = [strings[g] for g in self.group_ids[self.group_offsets[i]:self.group_offsets[i+1]]]
+        return Lesson(self.lesson_id(i), strings[self.subject[i]], strings[self.type[i]], groups,
+                      strings[self.teacher[i]], strings[self.classroom[i]], self.hours[i], self.instance[i])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def lesson_id(self, i):
+        if self.suffixed:
+            return f"{self.strings[self.source[i]]}_{self.instance[i]}"
+        return self.strings[self.source[i]]
+
+    def same_key(self, i):
+        """Ключ (id, instance): занятия с равными ключами не конфликтуют"""
+        return self.source[i], self.instance[i]
+
+    def resources(self, i):
+        for pos in range(self.group_offsets[i], self.group_offsets[i+1]):
+            yield 3 * self.group_ids[pos] + self.GROUP
+        yield 3 * self.teacher[i] + self.TEACHER
+        yield 3 * self.classroom[i] + self.CLASSROOM
+
+    def conflicts(self, i, j):
+        """Lesson.conflicts_with по номерам строк таблицы"""
+        if self.source[i] == self.source[j] and self.instance[i] == self.instance[j]:
+            return False
+        if self.teacher[i] == self.teacher[j] or self.classroom[i] == self.classroom[j]:
+            return True
+        mine = self.group_ids[self.group_offsets[i]:self.group_offsets[i+1]]
+        for pos in range(self.group_offsets[j], self.group_offsets[j+1]):
+            if self.group_ids[pos] in mine:
+                return True
+        return False
+
+
+class JsonStream:
+    """Потоковое чтение JSON-объекта верхнего уровня: элементы массивов-разделов
+    отдаются по одному, не загружая файл целиком"""
+    CHUNK = 1 << 16
+    WHITESPACE = " \t\n\r"
+
+    def __init__(self, f, sections):
+        self.f = f
+        self.sections = sections
+        self.text = codecs.getincrementaldecoder("utf-8")()
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.bytes = 0
+        self.hash = hashlib.sha256()
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.f.read(self.CHUNK)
+        self.bytes += len(chunk)
+        self.hash.update(chunk)
+        self.eof = not chunk
+        self.buf = self.buf[self.pos:] + self.text.decode(chunk, final=self.eof)
+        self.pos = 0
+        return not self.eof
+
+    def _peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in self.WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, chars, message):
+        ch = self._peek()
+        if not ch or ch not in chars:
+            raise json.JSONDecodeError(message, self.buf, self.pos)
+        self.pos += 1
+        return ch
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Значение могло оборваться на границе порции
+                if self._fill():
+                    continue
+                raise
+            # Число или литерал в самом конце буфера может продолжаться в следующей порции
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def __iter__(self):
+        """Пары (раздел, элемент); прочие ключи верхнего уровня пропускаются"""
+        self._expect("{", "Expecting '{'")
+        if self._peek() == "}":
+            self.pos += 1
+        else:
+            while True:
+                if self._peek() != '"':
+                    raise json.JSONDecodeError("Expecting property name enclosed in double quotes",
+                                               self.buf, self.pos)
+                key = self._value()
+                self._expect(":", "Expecting ':' delimiter")
+                if key in self.sections and self._peek() == "[":
+                    self.pos += 1
+                    if self._peek() == "]":
+                        self.pos += 1
+                    else:
+                        while True:
+                            yield key, self._value()
+                            if self._expect(",]", "Expecting ',' delimiter") == "]":
+                                break
+                else:
+                    self._value()
+                if self._expect(",}", "Expecting ',' delimiter") == "}":
+                    break
+        if self._peek():
+            raise json.JSONDecodeError("Extra data", self.buf, self.pos)
+
+
+def iter_bits(mask):
+    """Номера установленных битов маски по возрастанию"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def mask_of(vertices):
+    mask = 0
+    for v in vertices:
+        mask |= 1 << v
+    return mask
+
+
+class DenseRow:
+    def __init__(self, row):
+        self.row = row
+
+    def __getitem__(self, u):
+        return self.row[u]
+
+    def __len__(self):
+        return len(self.row)
+
+    def __iter__(self):
+        return iter(self.row)
+
+
+class DenseMatrix:
+    """Матрица смежности только для чтения поверх списков строк. Строки правит
+    только сам граф (_end_edit) - на месте, по затронутым вершинам"""
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __getitem__(self, v):
+        return DenseRow(self.rows[v])
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        for v in range(len(self.rows)):
+            yield self[v]
+
+    def __eq__(self, other):
+        return isinstance(other, DenseMatrix) and self.rows == other.rows
+
+
+class BitsetRow:
+    def __init__(self, mask, n):
+        self.mask = mask
+        self.n = n
+
+    def __getitem__(self, u):
+        return bool(self.mask >> u & 1)
+
+    def __len__(self):
+        return self.n
+
+    def __iter__(self):
+        for u in range(self.n):
+            yield bool(self.mask >> u & 1)
+
+
+class BitsetMatrix:
+    """Матрица смежности только для чтения поверх масок соседей"""
+    def __init__(self, masks):
+        self.masks = masks
+
+    def __getitem__(self, v):
+        return BitsetRow(self.masks[v], len(self.masks))
+
+    def __len__(self):
+        return len(self.masks)
+
+    def __iter__(self):
+        for v in range(len(self.masks)):
+            yield self[v]
+
+
+class CSRRow:
+    def __init__(self, indices, start, end, n):
+        self.indices = indices
+        self.start = start
+        self.end = end
+        self.n = n
+
+    def __getitem__(self, u):
+        pos = bisect_left(self.indices, u, self.start, self.end)
+        return pos < self.end and self.indices[pos] == u
+
+    def __len__(self):
+        return self.n
+
+    def __iter__(self):
+        for u in range(self.n):
+            yield self[u]
+
+
+class CSRMatrix:
+    """Матрица смежности только для чтения поверх сжатых строк (CSR)"""
+    def __init__(self, offsets, indices):
+        self.offsets = offsets
+        self.indices = indices
+
+    def __getitem__(self, v):
+        return CSRRow(self.indices, self.offsets[v], self.offsets[v+1], len(self))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        for v in range(len(self)):
+            yield self[v]
+
+
 class Graph:
-    def __init__(self, lessons, groups=None, teachers=None, classrooms=None, subjects=None):
+    BUILD_MODES = ("pairwise", "indexed", "numpy")
+    BACKENDS = ("dense", "bitset", "csr", "numpy")
+    # Сколько пар занятий разворачивать за раз при сборке через numpy
+    NUMPY_CHUNK = 1 << 22
+    # Двоичный снимок: заголовок, оглавление разделов, разделы с выравниванием на 8 байт
+    SNAPSHOT_MAGIC = b"SPGRAPH\0"
+    SNAPSHOT_VERSION = 1
+    SNAPSHOT_HEADER = struct.Struct("<8sII32sQI")
+    SNAPSHOT_SECTION = struct.Struct("<8sQQ")
+    SNAPSHOT_META = ("build", "strings", "groups", "teachers", "classrooms", "subjects")
+    SNAPSHOT_COLUMNS = ("source", "subject", "type", "teacher", "classroom",
+                        "group_offsets", "group_ids", "hours", "instance")
+
+    def __init__(self, lessons, groups=None, teachers=None, classrooms=None, subjects=None,
+                 build="pairwise", backend="dense", csr=None):
+        # csr - готовые строки соседей (offsets, indices), например из снимка:
+        # конфликты тогда не пересчитываются. build задаёт поиск конфликтов при любом
+        # backend: backend="numpy" - только вид хранения (матрица numpy)
+        if build not in self.BUILD_MODES:
+            raise ValueError(f"Неизвестный режим построения: {build}")
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Неизвестное представление графа: {backend}")
+        if np is None and "numpy" in (build, backend):
+            raise ImportError("Для построения через numpy нужен пакет numpy")
+        # Все построения идут по таблице; lessons - то, что передали (список Lesson
+        # или сама таблица), для вывода и сохранения
         self.lessons = lessons
+        self.table = lessons if isinstance(lessons, LessonTable) else LessonTable.from_lessons(lessons)
         self.groups = groups or {}
         self.teachers = teachers or {}
         self.classrooms = classrooms or {}
         self.subjects = subjects or {}
+        self.load_stats = None
+        self.source_hash = None
+        # Отображённый в память снимок, из которого читаются строки CSR
+        self._snapshot = None
+        # Индекс ресурсов для правки занятий, строится при первой правке
+        self._index = None
+        self._same = None
         self.n = len(lessons)
-        self.adj = self._build_adj()
-        self._neighbors_cache = {}
+        self.build = build
+        self.backend = backend
+        self.masks = None
+        self.offsets = None
+        self.indices = None
+        if csr is not None:
+            pairs = self._csr_pairs(*csr) if backend == "numpy" else None
+        elif build == "numpy":
+            pairs = self._numpy_pairs()
+        elif backend == "numpy":
+            # Матрица numpy собирается из строк, найденных способом build
+            pairs = self._csr_pairs(*self._build_csr())
+        else:
+            pairs = None
+        if backend == "csr":
+            self._set_csr(*(csr if csr is not None else self._build_csr(pairs)))
+        else:
+            if pairs is not None:
+                rows = self._pair_rows(pairs)
+            elif csr is not None:
+                offsets, indices = csr
+                rows = (indices[offsets[v]:offsets[v+1]] for v in range(self.n))
+            else:
+                rows = self._rows()
+            self.neighbor_lists = tuple(tuple(row) for row in rows)
+            if backend == "numpy":
+                self._adj = self._numpy_matrix(pairs)
+            elif backend == "bitset":
+                self.masks = self._build_masks(pairs)
+                self._adj = BitsetMatrix(self.masks)
+            else:
+                self._adj = self._build_adj(pairs)
+        # Степени и порядок "наибольшие первыми" (по убыванию степени, при равенстве -
+        # больший номер раньше) считаются сразу; порядок "наименьшие последними"
+        # дороже и считается при первом обращении
+        self._count_degrees()
+        self._mask_cache = {}
 
-    def _build_adj(self):
-        adj = [[False]*self.n for _ in range(self.n)]
+    @property
+    def adj(self):
+        """Матрица смежности только для чтения. Соседи, степени и порядки вершин
+        считаются один раз при построении, поэтому правка матрицы прошла бы мимо них:
+        граф меняется только через add_lesson/remove_lesson/modify_lesson,
+        граф с заданными рёбрами строит from_edges"""
+        return self._adj
+
+    def _set_csr(self, offsets, indices):
+        self.offsets, self.indices = offsets, indices
+        self._adj = CSRMatrix(offsets, indices)
+        # Строки CSR отдаются видами на indices, без копии
+        view = memoryview(indices).toreadonly()
+        self.neighbor_lists = tuple(view[offsets[v]:offsets[v+1]] for v in range(self.n))
+
+    # Виды memoryview не сериализуются pickle, а граф передаётся в процессы-исполнители
+    # (при запуске spawn - через pickle): виды и отображённый снимок отбрасываются,
+    # строки CSR копируются в массивы, после загрузки виды строятся заново
+    _VIEWS = ("degrees", "largest_first", "_smallest_last", "_snapshot")
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for key in self._VIEWS:
+            state[key] = None
+        if self.indices is not None:
+            state["offsets"] = array("q", self.offsets)
+            state["indices"] = array("i", self.indices)
+            del state["_adj"]
+            del state["neighbor_lists"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.indices is not None:
+            self._set_csr(self.offsets, self.indices)
+        self._count_degrees()
+
+    def _count_degrees(self):
+        degrees = array("i", [len(row) for row in self.neighbor_lists])
+        self.degrees = memoryview(degrees).toreadonly()
+        self.max_degree = max(degrees, default=0)
+        # Сортировка устойчива и при reverse=True, поэтому при равных степенях
+        # сохраняется исходный порядок - по убыванию номера
+        order = sorted(range(self.n - 1, -1, -1), key=degrees.__getitem__, reverse=True)
+        self.largest_first = memoryview(array("i", order)).toreadonly()
+        self._smallest_last = None
+        self._degeneracy = None
+        self._twins = None
+
+    def _rows(self):
+        """Отсортированные списки соседей по вершинам"""
+        if self.build == "indexed":
+            return self._indexed_rows()
+        return self._pairwise_rows()
+
+    def _pair_rows(self, pairs):
+        rows, cols = pairs
+        counts = np.bincount(rows, minlength=self.n)
+        return [part.tolist() for part in np.split(cols, np.cumsum(counts)[:-1])]
+
+    def _csr_pairs(self, offsets, indices):
+        counts = np.diff(np.frombuffer(offsets, dtype=np.int64))
+        rows = np.repeat(np.arange(self.n, dtype=np.int64), counts)
+        return rows, np.frombuffer(indices, dtype=np.int32).astype(np.int64)
+
+    def _pairwise_rows(self):
+        # Меньшие номера попадают в строку раньше, поэтому строки уже отсортированы
+        rows = [[] for _ in range(self.n)]
+        conflicts = self.table.conflicts
         for i in range(self.n):
             for j in range(i+1, self.n):
-                if self.lessons[i].conflicts_with(self.lessons[j]):
-                    adj[i][j] = adj[j][i] = True
+                if conflicts(i, j):
+                    rows[i].append(j)
+                    rows[j].append(i)
+        return rows
+
+    def _resource_index(self):
+        """Корзины занятий по группе, преподавателю и аудитории"""
+        index = {}
+        for i in range(self.n):
+            for key in self.table.resources(i):
+                index.setdefault(key, []).append(i)
+        return index
+
+    def _indexed_rows(self):
+        # Соседи вершины - объединение корзин её ресурсов,
+        # поэтому пары без общего ресурса вообще не перебираются
+        table = self.table
+        index = self._resource_index()
+        same = {}
+        for i in range(self.n):
+            same.setdefault(table.same_key(i), []).append(i)
+        for v in range(self.n):
+            row = set()
+            for key in table.resources(v):
+                row.update(index[key])
+            # Та же проверка, что и в Lesson.conflicts_with; заодно убирает саму v
+            row.difference_update(same[table.same_key(v)])
+            yield sorted(row)
+
+    def _numpy_pairs(self):
+        # Матрица конфликтов как булево произведение L·Lᵀ разреженной матрицы
+        # инцидентности L (занятие x ресурс): каждый столбец L даёт все пары занятий
+        # своего ресурса. Пары разворачиваются порциями примерно по NUMPY_CHUNK штук,
+        # возвращаются уникальные (строка, столбец) по возрастанию
+        n = self.n
+        res_ids = []
+        lesson_ids = []
+        for r, vertices in enumerate(self._resource_index().values()):
+            res_ids.extend([r] * len(vertices))
+            lesson_ids.extend(vertices)
+        lesson_ids = np.array(lesson_ids, dtype=np.int64)
+        sizes = np.bincount(np.array(res_ids, dtype=np.int64))
+        starts = np.concatenate(([0], np.cumsum(sizes)))
+        
+        keys = []
+        first = 0
+        while first < len(sizes):
+            # Ресурсы [first, last) разворачиваются вместе
+            cost = np.cumsum(sizes[first:] * sizes[first:])
+            last = first + max(1, int(np.searchsorted(cost, self.NUMPY_CHUNK, side="right")))
+            members = lesson_ids[starts[first]:starts[last]]
+            bucket = sizes[first:last]
+            # Каждое занятие повторяется по разу на каждое занятие своей корзины
+            repeat = np.repeat(bucket, bucket)
+            local = np.repeat(starts[first:last] - starts[first], bucket)
+            left = np.repeat(members, repeat)
+            shift = np.repeat(np.cumsum(repeat) - repeat, repeat)
+            right = members[np.repeat(local, repeat) + np.arange(len(left)) - shift]
+            keys.append(self._sorted_unique(left * n + right))
+            first = last
+        keys = self._sorted_unique(np.concatenate(keys)) if keys else np.zeros(0, dtype=np.int64)
+        rows = keys // n
+        cols = keys % n
+        
+        # Та же проверка, что и в Lesson.conflicts_with; заодно убирает диагональ
+        same = {}
+        group = np.array([same.setdefault(self.table.same_key(i), len(same))
+                          for i in range(n)], dtype=np.int64)
+        keep = group[rows] != group[cols]
+        return rows[keep], cols[keep]
+
+    @staticmethod
+    def _sorted_unique(keys):
+        # np.unique на больших массивах заметно медленнее сортировки на месте
+        keys.sort()
+        if len(keys) == 0:
+            return keys
+        keep = np.empty(len(keys), dtype=np.bool_)
+        keep[0] = True
+        np.not_equal(keys[1:], keys[:-1], out=keep[1:])
+        return keys[keep]
+
+    def _numpy_matrix(self, pairs):
+        rows, cols = pairs
+        adj = np.zeros((self.n, self.n), dtype=np.bool_)
+        adj[rows, cols] = True
+        adj.flags.writeable = False
         return adj
 
+    def _build_adj(self, pairs=None):
+        # Снаружи матрица только для чтения, как и в остальных представлениях
+        if pairs is not None:
+            return DenseMatrix(self._numpy_matrix(pairs).tolist())
+        adj = [[False]*self.n for _ in range(self.n)]
+        for v, row in enumerate(self.neighbor_lists):
+            adj_v = adj[v]
+            for u in row:
+                adj_v[u] = True
+        return DenseMatrix(adj)
+
+    def _build_masks(self, pairs=None):
+        if pairs is not None:
+            # Упакованные строки по 64 бита, младший бит - меньший номер вершины
+            rows, cols = pairs
+            packed = np.zeros((self.n, (self.n + 63) // 64), dtype="<u8")
+            bits = np.left_shift(np.uint64(1), (cols & 63).astype(np.uint64))
+            np.bitwise_or.at(packed, (rows, cols >> 6), bits)
+            return [int.from_bytes(row.tobytes(), "little") for row in packed]
+        # Биты ставим в bytearray, чтобы не пересоздавать большой int на каждом соседе
+        masks = []
+        for row in self.neighbor_lists:
+            bits = bytearray((self.n + 7) // 8)
+            for u in row:
+                bits[u >> 3] |= 1 << (u & 7)
+            masks.append(int.from_bytes(bits, "little"))
+        return masks
+
+    def _build_csr(self, pairs=None):
+        offsets = array("q", [0])
+        indices = array("i")
+        if pairs is not None:
+            # Пары уже отсортированы по строке, а внутри строки - по столбцу
+            rows, cols = pairs
+            counts = np.cumsum(np.bincount(rows, minlength=self.n), dtype=np.int64)
+            offsets.frombytes(counts.tobytes())
+            indices.frombytes(cols.astype(np.int32).tobytes())
+            return offsets, indices
+        for row in self._rows():
+            indices.extend(row)
+            offsets.append(len(indices))
+        return offsets, indices
+
     def neighbors(self, v):
-        if v in self._neighbors_cache:
-            return self._neighbors_cache[v]
-        res = [i for i in range(self.n) if self.adj[v][i]]
-        self._neighbors_cache[v] = res
-        return res
+        if self.indices is not None:
+            return tuple(self.neighbor_lists[v])
+        return self.neighbor_lists[v]
 
     def degree(self, v):
-        return len(self.neighbors(v))
+        return self.degrees[v]
+
+    @property
+    def smallest_last(self):
+        """Порядок "наименьшие последними": обратный порядку снятия вершин минимальной степени"""
+        if self._smallest_last is None:
+            self._order_by_degeneracy()
+        return self._smallest_last
+
+    @property
+    def degeneracy(self):
+        """Наибольшая степень вершины в момент её снятия"""
+        if self._degeneracy is None:
+            self._order_by_degeneracy()
+        return self._degeneracy
+
+    @property
+    def twins(self):
+        """Классы близнецов - вершин с одинаковой замкнутой окрестностью (в частности,
+        экземпляров одного занятия): попарно смежны и взаимозаменяемы в любой раскраске.
+        Кортежи вершин по возрастанию, только классы из двух и более вершин"""
+        if self._twins is None:
+            classes = {}
+            for v in range(self.n):
+                key = tuple(sorted((*self.neighbor_lists[v], v)))
+                classes.setdefault(key, []).append(v)
+            self._twins = tuple(tuple(c) for c in classes.values() if len(c) > 1)
+        return self._twins
+
+    def _order_by_degeneracy(self):
+        # Корзины по текущей степени; устаревшие записи пропускаются при извлечении
+        deg = array("i", self.degrees)
+        buckets = [[] for _ in range(self.max_degree + 1)]
+        for v in range(self.n):
+            buckets[deg[v]].append(v)
+        removed = bytearray(self.n)
+        order = []
+        d = 0
+        k = 0
+        for _ in range(self.n):
+            # После снятия вершины минимальная степень падает не больше чем на 1
+            d = max(d - 1, 0)
+            while True:
+                while not buckets[d]:
+                    d += 1
+                v = buckets[d].pop()
+                if not removed[v] and deg[v] == d:
+                    break
+            removed[v] = 1
+            order.append(v)
+            if d > k:
+                k = d
+            for u in self.neighbor_lists[v]:
+                if not removed[u]:
+                    deg[u] -= 1
+                    buckets[deg[u]].append(u)
+        order.reverse()
+        self._smallest_last = memoryview(array("i", order)).toreadonly()
+        self._degeneracy = k
+
+    # Правка занятий на месте. Соседи пересчитываются только у затронутых вершин -
+    # через индекс ресурсов, без перебора всех пар. При удалении на место вершины
+    # переезжает последняя, так что номера остальных вершин не меняются.
+    # Плотная матрица и маски правятся построчно, CSR и матрица numpy
+    # пересобираются из готовых списков соседей
+
+    LESSON_FIELDS = ("subject", "type", "groups", "teacher", "classroom", "hours_per_week")
+
+    def add_lesson(self, lesson):
+        """Добавить занятие (словарь как в JSON), по вершине на каждый час.
+        Возвращает номера новых вершин"""
+        # Часы с тем же id считались бы одним занятием и не конфликтовали бы
+        if self.table.rows_of(lesson['id']):
+            raise ValueError(f"Занятие уже есть: {lesson['id']}")
+        rows, touched = self._begin_edit()
+        first = self.n
+        self.table.expand_one(lesson)
+        for v in range(first, len(self.table)):
+            rows.append(())
+            self._link(rows, v, touched)
+        self._end_edit(rows, touched)
+        return list(range(first, len(rows)))
+
+    def remove_lesson(self, lesson_id):
+        """Удалить все часы занятия lesson_id. Возвращает число удалённых вершин"""
+        found = self.table.rows_of(lesson_id)
+        if not found:
+            raise ValueError(f"Нет занятия: {lesson_id}")
+        rows, touched = self._begin_edit()
+        # С конца: тогда переезжающая последняя вершина никогда не удаляется следом
+        for v in sorted(found, reverse=True):
+            self._drop(rows, v, touched)
+        self._end_edit(rows, touched)
+        return len(found)
+
+    def modify_lesson(self, lesson_id, **changes):
+        """Изменить поля занятия (LESSON_FIELDS); новое hours_per_week добавляет
+        или удаляет часы. Вершины оставшихся часов сохраняют свои номера"""
+        found = self.table.rows_of(lesson_id)
+        if not found:
+            raise ValueError(f"Нет занятия: {lesson_id}")
+        for key in changes:
+            if key not in self.LESSON_FIELDS:
+                raise ValueError(f"Поле занятия нельзя изменить: {key}")
+        current = self.table[found[0]]
+        fields = {key: getattr(current, key) for key in self.LESSON_FIELDS}
+        fields.update(changes)
+        hours = fields["hours_per_week"]
+        if hours < 1:
+            raise ValueError("У занятия должен быть хотя бы один час")
+        
+        rows, touched = self._begin_edit()
+        table = self.table
+        for v in sorted(found, reverse=True):
+            if table.instance[v] >= hours:
+                self._drop(rows, v, touched)
+        kept = table.rows_of(lesson_id)
+        for v in kept:
+            self._unlink(rows, v, touched)
+            table.set_row(v, **fields)
+            self._link(rows, v, touched)
+        existing = {table.instance[v] for v in kept}
+        for i in range(hours):
+            if i not in existing:
+                id = lesson_id if table.suffixed else f"{lesson_id}_{i}"
+                table.append(id, instance=i, **fields)
+                rows.append(())
+                self._link(rows, len(rows) - 1, touched)
+        self._end_edit(rows, touched)
+
+    def _begin_edit(self):
+        if self._index is None:
+            self._index = {}
+            self._same = {}
+            for v in range(self.n):
+                for key in self.table.resources(v):
+                    self._index.setdefault(key, set()).add(v)
+                self._same.setdefault(self.table.same_key(v), set()).add(v)
+        return list(self.neighbor_lists), set()
+
+    def _link(self, rows, v, touched):
+        # Вершина v уже в таблице: заносим её в индекс и связываем с соседями
+        table = self.table
+        row = set()
+        for key in table.resources(v):
+            bucket = self._index.setdefault(key, set())
+            bucket.add(v)
+            row |= bucket
+        same = self._same.setdefault(table.same_key(v), set())
+        same.add(v)
+        row -= same
+        rows[v] = tuple(sorted(row))
+        for u in row:
+            rows[u] = self._with(rows[u], v)
+        touched.add(v)
+        touched.update(row)
+
+    def _unlink(self, rows, v, touched):
+        table = self.table
+        for u in rows[v]:
+            rows[u] = self._without(rows[u], v)
+        touched.update(rows[v])
+        touched.add(v)
+        for key in table.resources(v):
+            self._index[key].discard(v)
+        self._same[table.same_key(v)].discard(v)
+        rows[v] = ()
+
+    def _drop(self, rows, v, touched):
+        self._unlink(rows, v, touched)
+        last = len(rows) - 1
+        table = self.table
+        if v != last:
+            # Последняя вершина получает номер v
+            for key in table.resources(last):
+                self._index[key].discard(last)
+                self._index[key].add(v)
+            same = self._same[table.same_key(last)]
+            same.discard(last)
+            same.add(v)
+            for u in rows[last]:
+                rows[u] = self._with(self._without(rows[u], last), v)
+            rows[v] = rows[last]
+            table.move(last, v)
+            touched.update(rows[v])
+        rows.pop()
+        table.pop()
+        touched.discard(last)
+
+    @staticmethod
+    def _with(row, v):
+        row = list(row)
+        insort(row, v)
+        return tuple(row)
+
+    @staticmethod
+    def _without(row, v):
+        return tuple(u for u in row if u != v)
+
+    def _end_edit(self, rows, touched):
+        n = len(rows)
+        self.n = n
+        self.lessons = self.table
+        # Граф больше не совпадает с исходным JSON
+        self.source_hash = None
+        touched = [v for v in touched if v < n]
+        rows = [tuple(row) for row in rows] if self.backend in ("csr", "numpy") else rows
+        self.neighbor_lists = tuple(rows)
+        if self.backend == "csr":
+            offsets = array("q", [0])
+            indices = array("i")
+            for row in rows:
+                indices.extend(row)
+                offsets.append(len(indices))
+            self._set_csr(offsets, indices)
+        elif self.backend == "numpy":
+            counts = array("q", [0])
+            indices = array("i")
+            for row in rows:
+                indices.extend(row)
+                counts.append(len(indices))
+            self._adj = self._numpy_matrix(self._csr_pairs(counts, indices))
+        elif self.backend == "bitset":
+            del self.masks[n:]
+            self.masks.extend([0] * (n - len(self.masks)))
+            for v in touched:
+                self.masks[v] = mask_of(rows[v])
+        else:
+            adj = self._adj.rows
+            if len(adj) != n:
+                # Столбцы меняются только вместе с числом вершин
+                del adj[n:]
+                for row in adj:
+                    del row[n:]
+                    row.extend([False] * (n - len(row)))
+                adj.extend([False] * n for _ in range(n - len(adj)))
+            for v in touched:
+                adj_v = [False] * n
+                for u in rows[v]:
+                    adj_v[u] = True
+                adj[v] = adj_v
+        for v in list(self._mask_cache):
+            if v >= n:
+                del self._mask_cache[v]
+        for v in touched:
+            self._mask_cache.pop(v, None)
+        self._count_degrees()
+
+    def components(self):
+        """Компоненты связности: списки вершин по возрастанию, компоненты - по первой вершине"""
+        seen = bytearray(self.n)
+        components = []
+        for root in range(self.n):
+            if seen[root]:
+                continue
+            seen[root] = 1
+            component = [root]
+            for v in component:
+                for u in self.neighbor_lists[v]:
+                    if not seen[u]:
+                        seen[u] = 1
+                        component.append(u)
+            component.sort()
+            components.append(component)
+        return components
+
+    def subgraph(self, vertices):
+        """Граф на вершинах vertices (i-я вершина подграфа - vertices[i]) в том же
+        представлении; строится из готовых списков соседей, без поиска конфликтов"""
+        position = {v: i for i, v in enumerate(vertices)}
+        offsets = array("q", [0])
+        indices = array("i")
+        for v in vertices:
+            indices.extend(sorted(position[u] for u in self.neighbor_lists[v] if u in position))
+            offsets.append(len(indices))
+        return Graph(self.table.take(vertices), self.groups, self.teachers, self.classrooms, self.subjects,
+                     build=self.build, backend=self.backend, csr=(offsets, indices))
+
+    def repair_coloring(self, colors):
+        """Правильная раскраска, ближайшая к colors: вершины без цвета и часть вершин
+        в конфликте перекрашиваются жадно, остальные сохраняют свой класс.
+        Пустые классы убираются. Возвращает (раскраска, сколько вершин перекрашено)"""
+        if len(colors) != self.n:
+            raise ValueError(f"Раскраска на {len(colors)} вершин, а в графе {self.n}")
+        result = [c if isinstance(c, int) and c >= 0 else -1 for c in colors]
+        # Из каждого конфликта убираем вершину, у которой конфликтов больше
+        clashes = [sum(1 for u in self.neighbor_lists[v] if result[u] == result[v] != -1) for v in range(self.n)]
+        for v in sorted(range(self.n), key=lambda v: -clashes[v]):
+            if clashes[v] and result[v] != -1 and not self.is_safe(v, result[v], result):
+                result[v] = -1
+        recolored = result.count(-1)
+        
+        renumber = {c: i for i, c in enumerate(sorted(set(result) - {-1}))}
+        result = [renumber.get(c, -1) for c in result]
+        for v in self.largest_first:
+            if result[v] == -1:
+                used = {result[u] for u in self.neighbor_lists[v]}
+                c = 0
+                while c in used:
+                    c += 1
+                result[v] = c
+        return result, recolored
+
+    def coloring_ids(self, colors):
+        """Раскраска по id занятий: не зависит от номеров вершин, которые меняются при правке"""
+        return {self.table.lesson_id(v): c for v, c in enumerate(colors)}
+
+    def coloring_from_ids(self, slots):
+        """Раскраска по номерам вершин из словаря id -> цвет; нет в словаре - -1"""
+        return [slots.get(self.table.lesson_id(v), -1) for v in range(self.n)]
+
+    def load_coloring(self, path):
+        """Раскраска из файла save_coloring: цвет занятия - его time_slot,
+        занятия, которых нет в файле, остаются без цвета (-1)"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            slots = {}
+            for entry in data.get('schedule', []):
+                slots.setdefault(entry['lesson_id'], entry['time_slot'])
+            return self.coloring_from_ids(slots)
+        except FileNotFoundError:
+            print(f"Файл не найден: {path}")
+            return None
+        except json.JSONDecodeError:
+            print(f"Ошибка формата JSON")
+            return None
+        except Exception as e:
+            print(f"Ошибка: {e}")
+            return None
 
     def is_safe(self, v, c, colors):
-        for u in self.neighbors(v):
+        for u in self.neighbor_lists[v]:
             if colors[u] == c:
                 return False
         return True
 
+    def neighbor_mask(self, v):
+        """Соседи вершины v одним целым числом"""
+        if self.masks is not None:
+            return self.masks[v]
+        if v not in self._mask_cache:
+            if self.backend == "numpy":
+                row = np.packbits(self.adj[v], bitorder="little")
+                self._mask_cache[v] = int.from_bytes(row.tobytes(), "little")
+            else:
+                self._mask_cache[v] = mask_of(self.neighbors(v))
+        return self._mask_cache[v]
+
+    def common_neighbors(self, u, v):
+        return self.neighbor_mask(u) & self.neighbor_mask(v)
+
+    @staticmethod
+    def popcount(mask):
+        return mask.bit_count()
+
+    def color_masks(self, colors):
+        """Маски цветовых классов: i-й элемент - вершины цвета i"""
+        classes = []
+        for v, c in enumerate(colors):
+            if c == -1:
+                continue
+            while len(classes) <= c:
+                classes.append(0)
+            classes[c] |= 1 << v
+        return classes
+
+    def has_colored_neighbor(self, v, class_mask):
+        """Есть ли у v сосед из цветового класса class_mask"""
+        return bool(self.neighbor_mask(v) & class_mask)
+
     @staticmethod
-    def load_from_json(path):
+    def load_from_json(path, build="indexed", backend="dense"):
+        # Файл читается потоком: разделы разбираются по одной записи,
+        # занятия сразу разворачиваются в LessonTable.
+        # Скорость загрузки сохраняется в graph.load_stats
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
+            start = time.time()
             groups = {}
-            for g in data.get('groups', []):
-                groups[g['id']] = Group(**g)
-            
             teachers = {}
-            for t in data.get('teachers', []):
-                teachers[t['id']] = Teacher(**t)
-            
             classrooms = {}
-            for c in data.get('classrooms', []):
-                classrooms[c['id']] = Classroom(**c)
-            
             subjects = {}
-            for s in data.get('subjects', []):
-                subjects[s['id']] = Subject(**s)
-            
-            lessons_data = data.get('lessons', [])
-            expanded = expand_lessons(lessons_data)
+            expanded = LessonTable(suffixed=True)
+            sections = {
+                'groups': (groups, Group),
+                'teachers': (teachers, Teacher),
+                'classrooms': (classrooms, Classroom),
+                'subjects': (subjects, Subject),
+            }
+            records = 0
+            with open(path, 'rb') as f:
+                stream = JsonStream(f, ('lessons',) + tuple(sections))
+                for key, record in stream:
+                    records += 1
+                    if key == 'lessons':
+                        expanded.expand_one(record)
+                    else:
+                        target, cls = sections[key]
+                        target[record['id']] = cls(**record)
             
             if not expanded:
                 print("Нет занятий")
                 return None
             
-            return Graph(expanded, groups, teachers, classrooms, subjects)
+            graph = Graph(expanded, groups, teachers, classrooms, subjects, build=build, backend=backend)
+            graph.source_hash = stream.hash.hexdigest()
+            elapsed = time.time() - start
+            graph.load_stats = {
+                "records": records,
+                "bytes": stream.bytes,
+                "time": round(elapsed, 3),
+                "records_per_sec": round(records / elapsed) if elapsed else None,
+                "bytes_per_sec": round(stream.bytes / elapsed) if elapsed else None,
+            }
+            return graph
             
         except FileNotFoundError:
             print(f"Файл не найден: {path}")
@@ -211,4 +1238,168 @@ class Graph:
             return True
         except Exception as e:
             print(f"Ошибка сохранения: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    @staticmethod
+    def file_hash(path):
+        """SHA-256 содержимого файла, как в graph.source_hash"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(JsonStream.CHUNK), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def save_snapshot(self, path):
+        """Сохранить граф в двоичный снимок: справочники, таблицу занятий и строки CSR.
+        В заголовке - хэш исходного JSON (source_hash), чтобы узнавать устаревшие снимки"""
+        try:
+            table = self.table
+            if self.indices is not None:
+                offsets, indices = self.offsets, self.indices
+            else:
+                offsets = array("q", [0])
+                indices = array("i")
+                for row in self.neighbor_lists:
+                    indices.extend(row)
+                    offsets.append(len(indices))
+            meta = {
+                "build": self.build,
+                "strings": table.strings,
+                "groups": [{key: getattr(g, key) for key in Group.__slots__} for g in self.groups.values()],
+                "teachers": [{key: getattr(t, key) for key in Teacher.__slots__} for t in self.teachers.values()],
+                "classrooms": [{key: getattr(c, key) for key in Classroom.__slots__} for c in self.classrooms.values()],
+                "subjects": [{key: getattr(s, key) for key in Subject.__slots__} for s in self.subjects.values()],
+            }
+            sections = [(b"meta", json.dumps(meta, ensure_ascii=False).encode("utf-8"))]
+            for name in self.SNAPSHOT_COLUMNS:
+                sections.append((name.encode()[:8], array("i", getattr(table, name)).tobytes()))
+            sections.append((b"offsets", array("q", offsets).tobytes()))
+            sections.append((b"indices", array("i", indices).tobytes()))
+            
+            digest = bytes.fromhex(self.source_hash) if self.source_hash else bytes(32)
+            header = self.SNAPSHOT_HEADER.pack(self.SNAPSHOT_MAGIC, self.SNAPSHOT_VERSION,
+                                               int(table.suffixed), digest, self.n, len(sections))
+            pos = self.SNAPSHOT_HEADER.size + self.SNAPSHOT_SECTION.size * len(sections)
+            directory = []
+            for name, data in sections:
+                pos = (pos + 7) & ~7
+                directory.append(self.SNAPSHOT_SECTION.pack(name, pos, len(data)))
+                pos += len(data)
+            
+            # Пишем во временный файл и подменяем: старый снимок может быть открыт через mmap
+            tmp = path + ".tmp"
+            with open(tmp, 'wb') as f:
+                f.write(header)
+                f.write(b"".join(directory))
+                for name, data in sections:
+                    f.write(bytes(-f.tell() % 8))
+                    f.write(data)
+            os.replace(tmp, path)
+            return True
+        except Exception as e:
+            print(f"Ошибка сохранения снимка: {e}")
+            return False
+
+    @staticmethod
+    def from_edges(lessons, edges, backend="dense"):
+        """Граф на занятиях lessons с рёбрами edges (пары номеров вершин) вместо
+        конфликтов по ресурсам - для синтетических графов в тестах и замерах"""
+        n = len(lessons)
+        rows = [set() for _ in range(n)]
+        for u, v in edges:
+            if u != v:
+                rows[u].add(v)
+                rows[v].add(u)
+        offsets = array("q", [0])
+        indices = array("i")
+        for row in rows:
+            indices.extend(sorted(row))
+            offsets.append(len(indices))
+        return Graph(lessons, backend=backend, csr=(offsets, indices))
+
+    @staticmethod
+    def load_snapshot(path, source=None, backend="dense"):
+        """Загрузить граф из снимка через mmap, без разбора JSON и поиска конфликтов.
+        source - исходный JSON: если его хэш не совпадает с записанным, снимок
+        устарел и возвращается None. Повреждённый снимок или чужая версия - ValueError"""
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        sections = {}
+        csr = ()
+        graph = None
+        try:
+            header = Graph.SNAPSHOT_HEADER
+            if len(view) < header.size:
+                raise ValueError("Файл не является снимком графа")
+            magic, version, flags, digest, n, count = header.unpack_from(view)
+            if magic != Graph.SNAPSHOT_MAGIC:
+                raise ValueError("Файл не является снимком графа")
+            if version != Graph.SNAPSHOT_VERSION:
+                raise ValueError(f"Неподдерживаемая версия снимка: {version}")
+            if source is not None and digest.hex() != Graph.file_hash(source):
+                return None
+            if header.size + count * Graph.SNAPSHOT_SECTION.size > len(view):
+                raise ValueError("Снимок графа обрезан")
+            
+            for i in range(count):
+                name, offset, length = Graph.SNAPSHOT_SECTION.unpack_from(view, header.size + i * Graph.SNAPSHOT_SECTION.size)
+                if offset + length > len(view):
+                    raise ValueError("Снимок графа обрезан")
+                sections[name.rstrip(b"\0").decode()] = view[offset:offset + length]
+            
+            required = ("meta", *(name[:8] for name in Graph.SNAPSHOT_COLUMNS), "offsets", "indices")
+            missing = [name for name in required if name not in sections]
+            if missing:
+                raise ValueError(f"В снимке графа нет разделов: {', '.join(missing)}")
+            if len(sections["offsets"]) != 8 * (n + 1) or len(sections["indices"]) % 4:
+                raise ValueError("Снимок графа повреждён")
+            meta = json.loads(bytes(sections["meta"]).decode("utf-8"))
+            if not isinstance(meta, dict) or not all(key in meta for key in Graph.SNAPSHOT_META):
+                raise ValueError("Снимок графа повреждён")
+            table = LessonTable(suffixed=bool(flags & 1))
+            table.strings = meta["strings"]
+            table.codes = {value: code for code, value in enumerate(table.strings)}
+            for name in Graph.SNAPSHOT_COLUMNS:
+                column = array("i")
+                column.frombytes(sections[name[:8]])
+                setattr(table, name, column)
+            if len(table) != n:
+                raise ValueError("Снимок графа повреждён")
+            groups = {g['id']: Group(**g) for g in meta["groups"]}
+            teachers = {t['id']: Teacher(**t) for t in meta["teachers"]}
+            classrooms = {c['id']: Classroom(**c) for c in meta["classrooms"]}
+            subjects = {s['id']: Subject(**s) for s in meta["subjects"]}
+            # Строки CSR читаются прямо из отображённого файла, без копии
+            csr = (sections["offsets"].cast("q"), sections["indices"].cast("i"))
+            graph = Graph(table, groups, teachers, classrooms, subjects,
+                          build=meta["build"], backend=backend, csr=csr)
+            graph.source_hash = digest.hex() if any(digest) else None
+            graph._snapshot = mapped
+            return graph
+        finally:
+            if graph is None:
+                # Устаревший или повреждённый снимок: отображение закрывается,
+                # но только после освобождения всех срезов - иначе BufferError
+                for part in (*csr, *sections.values(), view):
+                    part.release()
+                try:
+                    mapped.close()
+                except BufferError:
+                    # Срезы остались у недостроенного графа - закроется сборщиком мусора
+                    pass
+
+    @staticmethod
+    def load_cached(path, build="indexed", backend="dense", snapshot=None):
+        """load_from_json со снимком рядом с файлом (path + ".snapshot"):
+        актуальный снимок загружается, иначе граф строится заново и снимок перезаписывается"""
+        snapshot = snapshot or path + ".snapshot"
+        try:
+            graph = Graph.load_snapshot(snapshot, source=path, backend=backend)
+        except (OSError, ValueError):
+            graph = None
+        if graph is None:
+            graph = Graph.load_from_json(path, build=build, backend=backend)
+            if graph is not None:
+                graph.save_snapshot(snapshot)
+        return graph
\ No newline at end of file
@@ -2,6 +2,7 @@ import pytest
 import json
 import os
 import time
+import random
 import psutil
 from pytest_bdd import scenarios, given, when, then, parsers
 from models import Graph, Lesson, Group, Teacher, Classroom, Subject
@@ -66,6 +67,17 @@ def context():
         'metrics': {}
     }
 
+def with_random_edges(lessons, density):
+    """Граф на lessons: конфликты по ресурсам плюс случайные рёбра с вероятностью density.
+    Матрица смежности графа только для чтения, поэтому рёбра задаются при построении"""
+    base = Graph(lessons)
+    edges = [(i, j) for i in range(base.n) for j in base.neighbors(i) if i < j]
+    for i in range(base.n):
+        for j in range(i+1, base.n):
+            if random.random() < density:
+                edges.append((i, j))
+    return Graph.from_edges(lessons, edges)
+
 @pytest.fixture(autouse=True)
 def setup_test_data():
     """Создание всех тестовых данных перед запуском тестов"""
@@ -217,12 +229,7 @@ def generate_graph(context, size, density):
         )
         lessons.append(lesson)
     
-    context['graph'] = Graph(lessons)
-    
-    for i in range(size):
-        for j in range(i+1, size):
-            if random.random() < density:
-                context['graph'].adj[i][j] = context['graph'].adj[j][i] = True
+    context['graph'] = with_random_edges(lessons, density)
 
 @given(parsers.parse('преподаватель {teacher_name} с нагрузкой {load:d} часов'))
 def teacher_with_load(context, teacher_name, load):
@@ -255,12 +262,7 @@ def create_multiple_graphs(context):
             )
             lessons.append(lesson)
         
-        graph = Graph(lessons)
-        for i in range(size):
-            for j in range(i+1, size):
-                if random.random() < 0.3:
-                    graph.adj[i][j] = graph.adj[j][i] = True
-        context['graphs'].append(graph)
+        context['graphs'].append(with_random_edges(lessons, 0.3))
 
 @given(parsers.parse('создан граф размером {size:d} с плотностью {density:f}'))
 def create_perf_graph(context, size, density):
@@ -280,11 +282,7 @@ def create_perf_graph(context, size, density):
         )
         lessons.append(lesson)
     
-    context['graph'] = Graph(lessons)
-    for i in range(size):
-        for j in range(i+1, size):
-            if random.random() < density:
-                context['graph'].adj[i][j] = context['graph'].adj[j][i] = True
+    context['graph'] = with_random_edges(lessons, density)
 
 # When шаги 
 @when(parsers.parse('пользователь загружает файл "{file}"'))
@@ -636,11 +634,7 @@ def create_graph_step(context, size, density):
         )
         lessons.append(lesson)
     
-    context['graph'] = Graph(lessons)
-    for i in range(size):
-        for j in range(i+1, size):
-            if random.random() < density:
-                context['graph'].adj[i][j] = context['graph'].adj[j][i] = True
+    context['graph'] = with_random_edges(lessons, density)
 
 @then('измеряется время выполнения')
 def measure_time_step(context):
@@ -80,18 +80,15 @@ class PerformanceTester:
             )
             lessons.append(lesson)
         
-        graph = Graph(lessons)
-        
-        # Создаем матрицу смежности с заданной плотностью
+        # Создаем граф с заданной плотностью
         random.seed(42 + n * int(density * 100))
-        adj = [[False]*n for _ in range(n)]
+        edges = []
         for i in range(n):
             for j in range(i+1, n):
                 if random.random() < density:
-                    adj[i][j] = adj[j][i] = True
-        graph.adj = adj
+                    edges.append((i, j))
         
-        return graph
+        return Graph.from_edges(lessons, edges)
     
     def analyze_results(self):
         """Анализ результатов тестирования"""
@@ -5,14 +5,51 @@ import pytest
 from parameterized import parameterized
 from hamcrest import assert_that, is_, has_item, contains_string, greater_than
 from unittest.mock import Mock, patch, MagicMock
+import io
+import random
 import json
+import time
+import shutil
+import mmap
+import pickle
+import tempfile
+import multiprocessing
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models import Group, Teacher, Classroom, Subject, Lesson, Graph
+import models
+from models import Group, Teacher, Classroom, Subject, Lesson, Graph, LessonTable
 from algorithms.branch_bound import BranchBoundSolver
 from algorithms.independent_sets import IndependentSetSolver
 from algorithms.brown import BrownAlgorithm
+from algorithms.saturation import SaturationTracker
+from algorithms.engine import Budget, run, walk
+from algorithms.portfolio import PortfolioSolver
+from algorithms.decompose import ComponentSolver
+from algorithms.heuristics import HEURISTICS, DSaturSolver, TabuColSolver, greedy_coloring, greedy_clique
+from algorithms.reduction import ReducedSolver, reduce_graph, extend_coloring, DOMINATED
+from algorithms.bounds import BOUNDS, ColorClassBound, FractionalBound, make_bounds, gap_statistics
+from algorithms.cache import SolutionCache, set_default_cache
+
+
+def proper_coloring(graph, colors):
+    """Все занятия покрашены, соседние - в разные цвета"""
+    return -1 not in colors and all(graph.is_safe(v, colors[v], colors) for v in range(graph.n))
+
+
+def random_lesson(rng, i, groups, teachers, classrooms, hours, subjects=None):
+    """Случайное занятие из одной-двух групп; subjects=None - у всех занятий один предмет"""
+    subject = "S" if subjects is None else f"S{rng.randrange(subjects)}"
+    return {"id": f"L{i}", "subject": subject, "type": "lecture",
+            "groups": [f"G{rng.randrange(groups)}" for _ in range(rng.randrange(1, 3))],
+            "teacher": f"T{rng.randrange(teachers)}", "classroom": f"R{rng.randrange(classrooms)}",
+            "hours_per_week": rng.randrange(1, hours)}
+
+
+def random_schedule(seed, size, **sizes):
+    """size случайных занятий; sizes - параметры random_lesson"""
+    rng = random.Random(seed)
+    return [random_lesson(rng, i, **sizes) for i in range(size)]
 
 
 
@@ -400,5 +437,1371 @@ class TestAssumptions(unittest.TestCase):
         # Проверка
         self.assertEqual(len(graph.lessons), 1)
 
+
+# РЕЖИМЫ ПОСТРОЕНИЯ ГРАФА
+
+
+class TestGraphBuildModes(unittest.TestCase):
+    """Индексированное построение совпадает с попарным"""
+
+    DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+    @parameterized.expand([
+        ("schedule.json",),
+        ("sparse_graph.json",),
+        ("perf_size30_density0.5.json",),
+    ])
+    def test_indexed_matches_pairwise(self, name):
+        path = os.path.join(self.DATA_DIR, name)
+        pairwise = Graph.load_from_json(path, build="pairwise")
+        indexed = Graph.load_from_json(path, build="indexed")
+        self.assertEqual(pairwise.adj, indexed.adj)
+        for v in range(pairwise.n):
+            self.assertEqual(pairwise.neighbors(v), indexed.neighbors(v))
+
+    def test_indexed_skips_same_instance(self):
+        lesson1 = Lesson("l1_0", "s1", "lecture", ["g1", "g1"], "t1", "c1", 1, 0)
+        lesson2 = Lesson("l1_0", "s1", "lecture", ["g1"], "t1", "c1", 1, 0)
+        graph = Graph([lesson1, lesson2], build="indexed")
+        self.assertFalse(graph.adj[0][1])
+        self.assertFalse(graph.adj[0][0])
+
+    def test_unknown_build_mode(self):
+        with self.assertRaises(ValueError):
+            Graph([], build="magic")
+
+
+class TestBitsetBackend(unittest.TestCase):
+    """Битовое представление смежности"""
+
+    def setUp(self):
+        lessons = [
+            Lesson("l1_0", "s1", "lecture", ["g1"], "t1", "c1", 1, 0),
+            Lesson("l2_0", "s1", "lecture", ["g1"], "t2", "c2", 1, 0),
+            Lesson("l3_0", "s1", "lecture", ["g2"], "t2", "c3", 1, 0),
+            Lesson("l4_0", "s1", "lecture", ["g3"], "t4", "c4", 1, 0),
+        ]
+        self.dense = Graph(lessons)
+        self.bitset = Graph(lessons, backend="bitset")
+
+    def test_same_api_results(self):
+        for v in range(self.dense.n):
+            self.assertEqual(self.dense.neighbors(v), self.bitset.neighbors(v))
+            self.assertEqual(self.dense.degree(v), self.bitset.degree(v))
+            self.assertEqual(list(self.dense.adj[v]), list(self.bitset.adj[v]))
+            self.assertEqual(self.dense.neighbor_mask(v), self.bitset.neighbor_mask(v))
+
+    def test_bulk_operations(self):
+        graph = self.bitset
+        self.assertEqual(graph.neighbor_mask(1), 0b101)
+        self.assertEqual(graph.common_neighbors(0, 2), 0b10)
+        self.assertEqual(Graph.popcount(graph.neighbor_mask(1)), 2)
+        classes = graph.color_masks([0, 1, 0, -1])
+        self.assertEqual(classes, [0b101, 0b10])
+        self.assertTrue(graph.has_colored_neighbor(1, classes[0]))
+        self.assertFalse(graph.has_colored_neighbor(3, classes[0]))
+        self.assertFalse(graph.is_safe(1, 0, [0, -1, -1, -1]))
+
+    def test_solvers_on_bitset(self):
+        for Solver in (BranchBoundSolver, IndependentSetSolver, BrownAlgorithm):
+            colors, num = Solver(self.dense).solve()
+            bit_colors, bit_num = Solver(self.bitset).solve()
+            self.assertEqual(colors, bit_colors)
+            self.assertEqual(num, bit_num)
+
+
+class TestCSRBackend(unittest.TestCase):
+    """Сжатое разреженное представление (CSR)"""
+
+    DATA_DIR = TestGraphBuildModes.DATA_DIR
+
+    @parameterized.expand([
+        ("sparse_graph.json",),
+        ("perf_size20_density0.8.json",),
+    ])
+    def test_matches_dense(self, name):
+        path = os.path.join(self.DATA_DIR, name)
+        dense = Graph.load_from_json(path)
+        csr = Graph.load_from_json(path, backend="csr")
+        self.assertEqual(len(csr.offsets), csr.n + 1)
+        colors = [v % 3 if v % 2 else -1 for v in range(dense.n)]
+        for v in range(dense.n):
+            self.assertEqual(dense.neighbors(v), csr.neighbors(v))
+            self.assertEqual(dense.degree(v), csr.degree(v))
+            self.assertEqual(list(dense.adj[v]), list(csr.adj[v]))
+            for c in range(3):
+                self.assertEqual(dense.is_safe(v, c, colors), csr.is_safe(v, c, colors))
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            Graph([], backend="sparse")
+
+
+class TestSaturationTracker(unittest.TestCase):
+    """Инкрементальный выбор вершины совпадает с полным перебором"""
+
+    def test_select_matches_scan(self):
+        path = os.path.join(TestGraphBuildModes.DATA_DIR, "perf_size20_density0.5.json")
+        graph = Graph.load_from_json(path)
+        for Solver, weight in ((BranchBoundSolver, 2), (BrownAlgorithm, 0)):
+            solver = Solver(graph)
+            tracker = SaturationTracker(graph, degree_weight=weight)
+            colors = [-1] * graph.n
+            order = [3, 17, 0, 9, 12, 5]
+            for v in order:
+                self.assertEqual(tracker.select(), solver._select(colors))
+                colors[v] = 0
+                tracker.assign(v)
+            self.assertEqual(tracker.colored_neighbors(4), sum(1 for u in graph.neighbors(4) if colors[u] != -1))
+            for v in reversed(order):
+                colors[v] = -1
+                tracker.unassign(v)
+                self.assertEqual(tracker.select(), solver._select(colors))
+
+
+class TestBoundCache(unittest.TestCase):
+    """Кэш клик-границы с вытеснением"""
+
+    def setUp(self):
+        self.graph = Graph.load_from_json(os.path.join(TestGraphBuildModes.DATA_DIR, "schedule.json"))
+
+    def test_limit_does_not_change_result(self):
+        full = BranchBoundSolver(self.graph)
+        colors, num = full.solve()
+        small = BranchBoundSolver(self.graph, cache_limit=2)
+        small_colors, small_num = small.solve()
+        self.assertEqual((colors, num), (small_colors, small_num))
+
+        stats = small.get_statistics()
+        self.assertLessEqual(stats["cache_size"], 2)
+        self.assertGreater(stats["cache_evictions"], 0)
+        self.assertEqual(stats["cache_misses"] - stats["cache_evictions"], stats["cache_size"])
+        self.assertEqual(full.get_statistics()["cache_evictions"], 0)
+
+
+class TestLowerBounds(unittest.TestCase):
+    """Подключаемые нижние границы метода ветвей и границ"""
+
+    # Цикл из пяти вершин и полный граф на четырёх вершинах
+    C5 = [0b10010, 0b00101, 0b01010, 0b10100, 0b01001]
+    K4 = [0b1110, 0b1101, 0b1011, 0b0111]
+
+    def test_bounds_on_small_graphs(self):
+        for name, Bound in BOUNDS.items():
+            self.assertEqual(Bound().compute(self.K4, 0b1111), 4, name)
+        self.assertEqual(ColorClassBound().compute(self.C5, 0b11111), 3)
+        self.assertEqual(ColorClassBound().compute(self.C5, 0b01111), 2)
+        self.assertEqual(FractionalBound().compute(self.C5, 0b11111), 2)
+
+    def test_unknown_bound(self):
+        with self.assertRaises(ValueError):
+            make_bounds("magic")
+
+    def test_bound_cuts_reported(self):
+        graph = Graph.load_from_json(os.path.join(TestGraphBuildModes.DATA_DIR, "perf_size20_density0.5.json"))
+        _, default_num = BranchBoundSolver(graph).solve()
+        solver = BranchBoundSolver(graph)
+        _, num = solver.solve(bounds=["greedy", "coloring", "fractional"])
+        stats = solver.get_statistics()
+        self.assertEqual(num, default_num)
+        self.assertEqual(set(stats["bound_cuts"]), {"greedy", "coloring", "fractional"})
+        self.assertEqual(sum(stats["bound_cuts"].values()), stats["cuts"])
+
+    def test_gap_statistics(self):
+        self.assertEqual(gap_statistics(4, 4), {"lower_bound": 4, "gap": 0, "optimal": True})
+        self.assertEqual(gap_statistics(5, 4), {"lower_bound": 4, "gap": 1, "optimal": False})
+        # Результат ниже нижней оценки - не оптимум и без отрицательного разрыва
+        self.assertEqual(gap_statistics(3, 4), {"lower_bound": 4, "gap": None, "optimal": False})
+
+class TestSearchEngine(unittest.TestCase):
+    """Перебор на явном стеке"""
+
+    def test_deeper_than_recursion_limit(self):
+        depth = sys.getrecursionlimit() * 5
+        visited = []
+
+        def step(frame):
+            # Кадр: [глубина, открыт ли]; у каждого кадра один потомок
+            if frame[1]:
+                return None
+            frame[1] = True
+            visited.append(frame[0])
+            if frame[0] < depth:
+                return [frame[0] + 1, False]
+            return None
+
+        run([0, False], step)
+        self.assertEqual(visited, list(range(depth + 1)))
+
+    def test_solvers_unchanged(self):
+        graph = Graph.load_from_json(os.path.join(TestGraphBuildModes.DATA_DIR, "perf_size20_density0.5.json"))
+        _, bb_num = BranchBoundSolver(graph).solve()
+        _, brown_num = BrownAlgorithm(graph).solve()
+        _, is_num = IndependentSetSolver(graph).solve()
+        self.assertEqual(bb_num, brown_num)
+        self.assertEqual(bb_num, is_num)
+
+class TestBudgets(unittest.TestCase):
+    """Поиск с ограничением по времени и числу узлов"""
+
+    def setUp(self):
+        self.graph = Graph.load_from_json(os.path.join(TestGraphBuildModes.DATA_DIR, "perf_size50_density0.5.json"))
+
+    def assert_proper(self, colors):
+        self.assertNotIn(-1, colors)
+        for v in range(self.graph.n):
+            for u in self.graph.neighbors(v):
+                self.assertNotEqual(colors[u], colors[v])
+
+    def test_node_limit_counts_opened_frames(self):
+        visited = []
+
+        def step(frame):
+            if frame[1]:
+                return None
+            frame[1] = True
+            visited.append(frame[0])
+            return [frame[0] + 1, False]
+
+        budget = Budget(node_limit=10)
+        self.assertFalse(run([0, False], step, budget))
+        self.assertEqual(visited, list(range(10)))
+        self.assertTrue(budget.exhausted)
+        # walk считает узлы так же, как run
+        visited.clear()
+        budget = Budget(node_limit=10)
+        walker = walk([0, False], step, budget)
+        with self.assertRaises(StopIteration) as stop:
+            while True:
+                next(walker)
+        self.assertFalse(stop.exception.value)
+        self.assertEqual(visited, list(range(10)))
+
+    def test_negative_limit(self):
+        with self.assertRaises(ValueError):
+            Budget(time_limit=-1)
+
+    @parameterized.expand([
+        ("branch_bound", BranchBoundSolver),
+        ("independent", IndependentSetSolver),
+        ("brown", BrownAlgorithm),
+    ])
+    def test_best_so_far_within_budget(self, name, Solver):
+        for limits in ({"node_limit": 50}, {"time_limit": 0.2}):
+            solver = Solver(self.graph)
+            start = time.time()
+            colors, num = solver.solve(**limits)
+            self.assertLess(time.time() - start, 5)
+            self.assert_proper(colors)
+            stats = solver.get_statistics()
+            self.assertEqual(num, max(colors) + 1)
+            self.assertGreaterEqual(stats["lower_bound"], 1)
+            self.assertEqual(stats["gap"], num - stats["lower_bound"])
+            self.assertEqual(stats["optimal"], stats["gap"] == 0)
+
+    def test_unlimited_search_completes(self):
+        solver = BranchBoundSolver(self.graph)
+        solver.solve()
+        self.assertTrue(solver.get_statistics()["completed"])
+
+class TestParallelBranchBound(unittest.TestCase):
+    """Метод ветвей и границ в пуле процессов"""
+
+    @parameterized.expand([
+        ("sparse", "perf_size30_density0.2.json"),
+        ("dense", "perf_size40_density0.8.json"),
+        ("medium", "perf_size50_density0.5.json"),
+    ])
+    def test_same_colors_as_sequential(self, name, filename):
+        graph = Graph.load_from_json(os.path.join(TestGraphBuildModes.DATA_DIR, filename))
+        _, num = BranchBoundSolver(graph).solve()
+        for split_depth in (None, 1):
+            solver = BranchBoundSolver(graph)
+            colors, par_num = solver.solve_parallel(workers=2, split_depth=split_depth)
+            self.assertEqual(par_num, num)
+            for v in range(graph.n):
+                for u in graph.neighbors(v):
+                    self.assertNotEqual(colors[u], colors[v])
+            stats = solver.get_statistics()
+            self.assertLessEqual(len(stats["workers"]), 2)
+            self.assertLessEqual(sum(w["nodes"] for w in stats["workers"]), stats["nodes"])
+
+    def test_split_respects_time_limit(self):
+        # Время кончилось на разрезе дерева: процессы не запускаются
+        graph = Graph.load_from_json(os.path.join(TestGraphBuildModes.DATA_DIR, "perf_size50_density0.5.json"))
+        solver = BranchBoundSolver(graph)
+        with patch("algorithms.branch_bound.ProcessPoolExecutor") as pool:
+            colors, num = solver.solve_parallel(workers=2, split_depth=graph.n, time_limit=0)
+        pool.assert_not_called()
+        self.assertTrue(proper_coloring(graph, colors))
+        self.assertEqual(num, max(colors) + 1)
+        stats = solver.get_statistics()
+        self.assertFalse(stats["completed"])
+        self.assertEqual(stats["workers"], [])
+
+    def test_single_worker_is_sequential(self):
+        graph = Graph.load_from_json(os.path.join(TestGraphBuildModes.DATA_DIR, "perf_size20_density0.5.json"))
+        solver = BranchBoundSolver(graph)
+        solver.solve_parallel(workers=1)
+        self.assertEqual(solver.get_statistics()["workers"], [])
+
+class TestPortfolio(unittest.TestCase):
+    """Параллельный запуск трёх решателей"""
+
+    def load(self, filename):
+        return Graph.load_from_json(os.path.join(TestGraphBuildModes.DATA_DIR, filename))
+
+    def test_stops_on_proven_optimum(self):
+        graph = self.load("perf_size10_density0.8.json")
+        solver = PortfolioSolver(graph)
+        colors, num = solver.solve()
+        stats = solver.get_statistics()
+        self.assertTrue(stats["optimal"])
+        self.assertTrue(stats["results"][stats["winner"]]["optimal"])
+        self.assertEqual(num, max(colors) + 1)
+
+    def test_best_of_all_within_budget(self):
+        graph = self.load("perf_size50_density0.5.json")
+        solver = PortfolioSolver(graph)
+        colors, num = solver.solve(time_limit=0.3)
+        stats = solver.get_statistics()
+        self.assertLess(stats["time"], 0.3 + PortfolioSolver.GRACE + 1)
+        self.assertEqual(num, min(res["colors"] for res in stats["results"].values()))
+        for v in range(graph.n):
+            for u in graph.neighbors(v):
+                self.assertNotEqual(colors[u], colors[v])
+
+    def test_unknown_solver(self):
+        with self.assertRaises(ValueError):
+            PortfolioSolver(self.load("test.json"), solvers=["magic"])
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "нужен fork")
+    def test_invalid_result_rejected(self):
+        class BrokenSolver:
+            # Все вершины одного цвета, но заявлен оптимум
+            def __init__(self, graph):
+                self.n = graph.n
+
+            def solve(self, time_limit=None, initial=None):
+                return [0] * self.n, 1
+
+            def get_statistics(self):
+                return {"optimal": True, "time": 0.0}
+
+        graph = self.load("perf_size10_density0.8.json")
+        with patch.dict("algorithms.portfolio.SOLVERS", {"broken": BrokenSolver}), \
+                patch("multiprocessing.get_context", return_value=multiprocessing.get_context("fork")):
+            solver = PortfolioSolver(graph, solvers=["broken", "branch_bound"])
+            colors, num = solver.solve()
+        stats = solver.get_statistics()
+        self.assertFalse(stats["results"]["broken"]["valid"])
+        self.assertFalse(stats["results"]["broken"]["optimal"])
+        self.assertEqual(stats["winner"], "branch_bound")
+        self.assertTrue(stats["optimal"])
+        self.assertTrue(proper_coloring(graph, colors))
+
+class TestMaximalSetEnumeration(unittest.TestCase):
+    """Перечисление максимальных множеств с опорной вершиной по Томите"""
+
+    def brute_force(self, graph):
+        # Все максимальные по включению множества попарно смежных вершин
+        from itertools import combinations
+        found = []
+        for size in range(graph.n, 0, -1):
+            for subset in combinations(range(graph.n), size):
+                if any(not graph.adj[a][b] for a, b in combinations(subset, 2)):
+                    continue
+                if any(set(subset) < set(other) for other in found):
+                    continue
+                found.append(subset)
+        return sorted(found)
+
+    @parameterized.expand([
+        ("plain", None),
+        ("degeneracy", "degeneracy"),
+    ])
+    def test_same_family_as_brute_force(self, name, ordering):
+        for filename in ("test.json", "perf_size10_density0.8.json"):
+            graph = Graph.load_from_json(os.path.join(TestGraphBuildModes.DATA_DIR, filename))
+            solver = IndependentSetSolver(graph)
+            sets = solver._find_sets(ordering=ordering)
+            self.assertEqual(sorted(tuple(s) for s in sets), self.brute_force(graph))
+            self.assertEqual(solver.set_masks[0], sum(1 << v for v in sets[0]))
+
+    def test_streaming_keeps_top_k(self):
+        graph = Graph.load_from_json(os.path.join(TestGraphBuildModes.DATA_DIR, "perf_size30_density0.5.json"))
+        full = IndependentSetSolver(graph)
+        all_sets = [list(s) for s in full._find_sets()]
+        stream = IndependentSetSolver(graph)
+        top = stream._find_sets(top_k=5)
+        self.assertEqual(top, all_sets[:5])
+        self.assertEqual(stream.sets_found, len(all_sets))
+        self.assertEqual(stream.discarded, len(all_sets) - 5)
+        self.assertLess(stream.peak_memory, full.peak_memory)
+
+    def test_streaming_statistics(self):
+        graph = Graph.load_from_json(os.path.join(TestGraphBuildModes.DATA_DIR, "perf_size20_density0.5.json"))
+        solver = IndependentSetSolver(graph)
+        colors, num = solver.solve(top_k=3, score="coverage")
+        stats = solver.get_statistics()
+        self.assertEqual(stats["sets_kept"], 3)
+        self.assertEqual(stats["sets_kept"] + stats["sets_discarded"], stats["sets_found"])
+        self.assertGreater(stats["peak_memory"], 0)
+        self.assertEqual(num, max(colors) + 1)
+        with self.assertRaises(ValueError):
+            IndependentSetSolver(graph).solve(top_k=0)
+        with self.assertRaises(ValueError):
+            IndependentSetSolver(graph).solve(score="random")
+
+    def test_ordered_cover_pulls_sets_on_demand(self):
+        graph = Graph.load_from_json(os.path.join(TestGraphBuildModes.DATA_DIR, "perf_size20_density0.5.json"))
+        _, exact_num = IndependentSetSolver(graph).solve()
+        cover = IndependentSetSolver._cover
+        seen = []
+
+        def counting_cover(self, frame):
+            seen.append(self.sets_found)
+            return cover(self, frame)
+
+        solver = IndependentSetSolver(graph)
+        with patch.object(IndependentSetSolver, "_cover", counting_cover):
+            colors, num = solver.solve(cover="ordered")
+        # Покрытие началось до первого найденного множества
+        self.assertEqual(seen[0], 0)
+        self.assertEqual(num, exact_num)
+        self.assertEqual(solver.get_statistics()["sets_found"], len(IndependentSetSolver(graph)._find_sets()))
+        self.assertTrue(proper_coloring(graph, colors))
+
+    def test_unknown_ordering(self):
+        graph = Graph.load_from_json(os.path.join(TestGraphBuildModes.DATA_DIR, "test.json"))
+        with self.assertRaises(ValueError):
+            IndependentSetSolver(graph).solve(ordering="random")
+
+class TestExactCover(unittest.TestCase):
+    """Точное покрытие множествами с выбором наименее покрытой вершины"""
+
+    @parameterized.expand([
+        ("sparse", "perf_size20_density0.2.json"),
+        ("medium", "perf_size20_density0.5.json"),
+        ("schedule", "schedule.json"),
+    ])
+    def test_same_result_as_ordered_cover(self, name, filename):
+        graph = Graph.load_from_json(os.path.join(TestGraphBuildModes.DATA_DIR, filename))
+        ordered = IndependentSetSolver(graph)
+        _, ordered_num = ordered.solve(cover="ordered")
+        exact = IndependentSetSolver(graph)
+        colors, exact_num = exact.solve()
+        self.assertEqual(exact_num, ordered_num)
+        self.assertEqual(len(colors), graph.n)
+        self.assertEqual(exact_num, max(colors) + 1)
+        self.assertLessEqual(exact.combinations, ordered.combinations)
+
+    def test_unknown_cover(self):
+        graph = Graph.load_from_json(os.path.join(TestGraphBuildModes.DATA_DIR, "test.json"))
+        with self.assertRaises(ValueError):
+            IndependentSetSolver(graph).solve(cover="random")
+
+class TestNumpyBuild(unittest.TestCase):
+    """Сборка матрицы конфликтов через numpy"""
+
+    def setUp(self):
+        if models.np is None:
+            self.skipTest("numpy не установлен")
+
+    @parameterized.expand([
+        ("schedule", "schedule.json"),
+        ("sparse", "sparse_graph.json"),
+        ("dense", "perf_size50_density0.8.json"),
+    ])
+    def test_same_graph_as_pairwise(self, name, filename):
+        path = os.path.join(TestGraphBuildModes.DATA_DIR, filename)
+        reference = Graph.load_from_json(path, build="pairwise")
+        for backend in Graph.BACKENDS:
+            graph = Graph.load_from_json(path, build="numpy", backend=backend)
+            for v in range(graph.n):
+                self.assertEqual(graph.neighbors(v), reference.neighbors(v))
+                self.assertEqual(graph.degree(v), reference.degree(v))
+                self.assertEqual(graph.neighbor_mask(v), reference.neighbor_mask(v))
+
+    def test_numpy_backend_is_bool_matrix(self):
+        graph = Graph.load_from_json(os.path.join(TestGraphBuildModes.DATA_DIR, "schedule.json"), backend="numpy")
+        self.assertEqual(graph.adj.dtype, models.np.bool_)
+        self.assertEqual(graph.adj.shape, (graph.n, graph.n))
+        self.assertFalse(graph.adj.diagonal().any())
+        _, num = BranchBoundSolver(graph).solve()
+        _, reference_num = BranchBoundSolver(Graph.load_from_json(os.path.join(TestGraphBuildModes.DATA_DIR, "schedule.json"))).solve()
+        self.assertEqual(num, reference_num)
+
+    def test_numpy_backend_honours_build(self):
+        path = os.path.join(TestGraphBuildModes.DATA_DIR, "perf_size30_density0.5.json")
+        reference = Graph.load_from_json(path, build="numpy", backend="numpy")
+        for build in ("pairwise", "indexed"):
+            with patch.object(Graph, "_numpy_pairs", side_effect=AssertionError(build)):
+                graph = Graph.load_from_json(path, build=build, backend="numpy")
+            self.assertEqual(graph.build, build)
+            self.assertTrue((graph.adj == reference.adj).all())
+
+    def test_small_chunks(self):
+        path = os.path.join(TestGraphBuildModes.DATA_DIR, "perf_size30_density0.5.json")
+        reference = Graph.load_from_json(path, backend="csr")
+        with patch.object(Graph, "NUMPY_CHUNK", 4):
+            graph = Graph.load_from_json(path, build="numpy", backend="csr")
+        self.assertEqual(list(graph.offsets), list(reference.offsets))
+        self.assertEqual(list(graph.indices), list(reference.indices))
+
+    def test_without_numpy(self):
+        lessons = [Lesson("L1", "S1", "lecture", ["G1"], "T1", "R1", 1)]
+        with patch.object(models, "np", None):
+            with self.assertRaises(ImportError):
+                Graph(lessons, build="numpy")
+
+class TestPrecomputedArrays(unittest.TestCase):
+    """Степени, списки соседей и порядки вершин, посчитанные при сборке графа"""
+
+    def _graph(self, backend="dense"):
+        return Graph.load_from_json(os.path.join(TestGraphBuildModes.DATA_DIR, "perf_size30_density0.5.json"),
+                                    backend=backend)
+
+    def test_degrees_and_largest_first(self):
+        graph = self._graph()
+        degrees = [len(graph.neighbors(v)) for v in range(graph.n)]
+        self.assertEqual(list(graph.degrees), degrees)
+        self.assertEqual(graph.max_degree, max(degrees))
+        order = [(degrees[v], v) for v in range(graph.n)]
+        order.sort(reverse=True)
+        self.assertEqual(list(graph.largest_first), [v for _, v in order])
+
+    def test_smallest_last_is_degeneracy_order(self):
+        graph = self._graph()
+        order = list(graph.smallest_last)
+        self.assertEqual(sorted(order), list(range(graph.n)))
+        # У каждой вершины не больше degeneracy соседей раньше неё в порядке
+        position = {v: i for i, v in enumerate(order)}
+        back = [sum(1 for u in graph.neighbors(v) if position[u] < position[v]) for v in order]
+        self.assertEqual(max(back), graph.degeneracy)
+
+    def test_arrays_are_read_only(self):
+        graph = self._graph()
+        with self.assertRaises(TypeError):
+            graph.degrees[0] = 0
+        with self.assertRaises(TypeError):
+            graph.largest_first[0] = 0
+
+    def test_same_across_backends(self):
+        reference = self._graph()
+        for backend in ("bitset", "csr"):
+            graph = self._graph(backend)
+            self.assertEqual([tuple(row) for row in graph.neighbor_lists], list(reference.neighbor_lists))
+            self.assertEqual(list(graph.largest_first), list(reference.largest_first))
+            self.assertEqual(list(graph.smallest_last), list(reference.smallest_last))
+
+class TestLessonTable(unittest.TestCase):
+    """Хранение занятий по столбцам"""
+
+    DATA = [
+        {"id": "L1", "subject": "S1", "type": "lecture", "groups": ["G1", "G2"],
+         "teacher": "T1", "classroom": "R1", "hours_per_week": 2},
+        {"id": "L2", "subject": "S2", "groups": "G2", "teacher": "T2", "classroom": "R2"},
+        {"id": "L3", "subject": "S1", "type": "practice", "groups": ["G3"],
+         "teacher": "T2", "classroom": "R1", "hours_per_week": 3},
+    ]
+
+    def test_expand_matches_expand_lessons(self):
+        table = LessonTable.expand(self.DATA)
+        expanded = models.expand_lessons(self.DATA)
+        self.assertEqual(len(table), len(expanded))
+        for lesson, reference in zip(table, expanded):
+            for field in Lesson.__slots__:
+                self.assertEqual(getattr(lesson, field), getattr(reference, field))
+        self.assertEqual(table[-1].id, "L3_2")
+
+    def test_strings_interned(self):
+        table = LessonTable.expand(self.DATA)
+        self.assertEqual(len(table.strings), len(set(table.strings)))
+        self.assertEqual(table.teacher[2], table.teacher[3])
+        self.assertNotIn("L1_0", table.strings)
+
+    def test_conflicts_match_lessons(self):
+        table = LessonTable.expand(self.DATA)
+        lessons = list(table)
+        for i in range(len(table)):
+            for j in range(len(table)):
+                self.assertEqual(table.conflicts(i, j), lessons[i].conflicts_with(lessons[j]))
+
+    def test_graph_from_table(self):
+        table = LessonTable.expand(self.DATA)
+        reference = Graph(models.expand_lessons(self.DATA), build="pairwise")
+        for build in ("pairwise", "indexed"):
+            graph = Graph(table, build=build)
+            self.assertEqual(list(graph.neighbor_lists), list(reference.neighbor_lists))
+        self.assertIs(graph.table, table)
+
+    def test_slots(self):
+        lesson = LessonTable.expand(self.DATA)[0]
+        for obj in (lesson, Group("g1", "G1"), Teacher("t1", "T1"), Classroom("c1", "C1"), Subject("s1", "S1")):
+            self.assertFalse(hasattr(obj, "__dict__"))
+
+class TestStreamingLoad(unittest.TestCase):
+    """Потоковая загрузка JSON"""
+
+    def _load(self, filename, chunk=None):
+        path = os.path.join(TestGraphBuildModes.DATA_DIR, filename)
+        if chunk is None:
+            return Graph.load_from_json(path)
+        with patch.object(models.JsonStream, "CHUNK", chunk):
+            return Graph.load_from_json(path)
+
+    @parameterized.expand([
+        ("schedule", "schedule.json"),
+        ("dense", "perf_size30_density0.5.json"),
+    ])
+    def test_same_as_json_load(self, name, filename):
+        with open(os.path.join(TestGraphBuildModes.DATA_DIR, filename), encoding="utf-8") as f:
+            data = json.load(f)
+        # Мелкие порции рвут строки, числа и литералы на границах
+        for chunk in (None, 1, 7):
+            graph = self._load(filename, chunk)
+            self.assertEqual([(l.id, l.groups, l.teacher, l.classroom) for l in graph.lessons],
+                             [(l.id, l.groups, l.teacher, l.classroom) for l in models.expand_lessons(data["lessons"])])
+            self.assertEqual(sorted(graph.groups), sorted(g["id"] for g in data.get("groups", [])))
+            self.assertEqual(sorted(graph.teachers), sorted(t["id"] for t in data.get("teachers", [])))
+
+    def test_load_stats(self):
+        graph = self._load("schedule.json")
+        stats = graph.load_stats
+        self.assertEqual(stats["bytes"], os.path.getsize(os.path.join(TestGraphBuildModes.DATA_DIR, "schedule.json")))
+        self.assertGreater(stats["records"], 0)
+
+    def test_stream_skips_other_keys(self):
+        text = '{"meta": {"lessons": [1]}, "lessons": [ {"a": 1} , {"b": [2, 3]} ], "n": 12345, "groups": []}'
+        stream = models.JsonStream(io.BytesIO(text.encode()), ("lessons", "groups"))
+        stream.CHUNK = 3
+        self.assertEqual(list(stream), [("lessons", {"a": 1}), ("lessons", {"b": [2, 3]})])
+
+    @parameterized.expand([
+        ("truncated", '{"lessons": [{"id": "L1"'),
+        ("no_comma", '{"lessons": [{} {}]}'),
+        ("extra_data", '{"lessons": []} []'),
+        ("not_object", '[]'),
+    ])
+    def test_malformed(self, name, text):
+        stream = models.JsonStream(io.BytesIO(text.encode()), ("lessons",))
+        with self.assertRaises(json.JSONDecodeError):
+            list(stream)
+
+    def test_errors_reported(self):
+        with patch("builtins.print") as mock_print:
+            self.assertIsNone(Graph.load_from_json("no_such_file.json"))
+        mock_print.assert_called_with("Файл не найден: no_such_file.json")
+        with patch("builtins.open", return_value=io.BytesIO(b'{"lessons": [')):
+            with patch("builtins.print") as mock_print:
+                self.assertIsNone(Graph.load_from_json("broken.json"))
+        mock_print.assert_called_with("Ошибка формата JSON")
+
+class TestSnapshot(unittest.TestCase):
+    """Двоичный снимок графа"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.source = os.path.join(self.dir, "schedule.json")
+        shutil.copy(os.path.join(TestGraphBuildModes.DATA_DIR, "schedule.json"), self.source)
+        self.path = os.path.join(self.dir, "schedule.snapshot")
+        self.graph = Graph.load_from_json(self.source)
+
+    def test_roundtrip(self):
+        self.assertTrue(self.graph.save_snapshot(self.path))
+        for backend in ("dense", "bitset", "csr"):
+            graph = Graph.load_snapshot(self.path, source=self.source, backend=backend)
+            self.assertEqual(graph.backend, backend)
+            self.assertEqual([tuple(row) for row in graph.neighbor_lists], list(self.graph.neighbor_lists))
+            self.assertEqual([repr(l) for l in graph.lessons], [repr(l) for l in self.graph.lessons])
+            self.assertEqual([l.id for l in graph.lessons], [l.id for l in self.graph.lessons])
+            self.assertEqual({k: g.name for k, g in graph.groups.items()},
+                             {k: g.name for k, g in self.graph.groups.items()})
+            self.assertEqual(graph.source_hash, self.graph.source_hash)
+        # CSR читается прямо из отображённого файла
+        self.assertIsInstance(graph.indices, memoryview)
+
+    def test_stale_snapshot(self):
+        self.graph.save_snapshot(self.path)
+        with open(self.source, "a", encoding="utf-8") as f:
+            f.write("\n")
+        self.assertIsNone(Graph.load_snapshot(self.path, source=self.source))
+        self.assertIsNotNone(Graph.load_snapshot(self.path))
+
+    def test_mapping_closed_when_not_loaded(self):
+        mapped = []
+
+        class TrackedMmap(mmap.mmap):
+            def __init__(self, *args, **kwargs):
+                mapped.append(self)
+
+        self.graph.save_snapshot(self.path)
+        with open(self.source, "a", encoding="utf-8") as f:
+            f.write("\n")
+        with patch("mmap.mmap", TrackedMmap):
+            self.assertIsNone(Graph.load_snapshot(self.path, source=self.source))
+            with patch.object(Graph, "SNAPSHOT_VERSION", Graph.SNAPSHOT_VERSION + 1):
+                with self.assertRaises(ValueError):
+                    Graph.load_snapshot(self.path)
+            graph = Graph.load_snapshot(self.path)
+        self.assertEqual(len(mapped), 3)
+        self.assertTrue(mapped[0].closed)
+        self.assertTrue(mapped[1].closed)
+        self.assertFalse(mapped[2].closed)
+        self.assertIs(graph._snapshot, mapped[2])
+
+    def test_bad_snapshot(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a snapshot at all, definitely not" * 2)
+        with self.assertRaises(ValueError):
+            Graph.load_snapshot(self.path)
+        with patch.object(Graph, "SNAPSHOT_VERSION", Graph.SNAPSHOT_VERSION + 1):
+            self.graph.save_snapshot(self.path)
+        with self.assertRaises(ValueError):
+            Graph.load_snapshot(self.path)
+
+    def test_damaged_snapshot(self):
+        self.graph.save_snapshot(self.path)
+        with open(self.path, "rb") as f:
+            data = f.read()
+        damaged = [data[:size] for size in (70, Graph.SNAPSHOT_HEADER.size + 10, len(data) // 2)]
+        damaged.append(data.replace(b'"strings"', b'"strinxs"'))
+        for content in damaged:
+            with open(self.path, "wb") as f:
+                f.write(content)
+            with self.assertRaises(ValueError):
+                Graph.load_snapshot(self.path)
+            # Повреждённый снимок пересобирается, а не роняет загрузку
+            graph = Graph.load_cached(self.source, snapshot=self.path)
+            self.assertEqual(list(graph.neighbor_lists), list(self.graph.neighbor_lists))
+
+    def test_load_cached(self):
+        graph = Graph.load_cached(self.source, snapshot=self.path)
+        self.assertTrue(os.path.exists(self.path))
+        self.assertIsNotNone(graph.load_stats)
+        with patch.object(Graph, "load_from_json") as mock_load:
+            cached = Graph.load_cached(self.source, snapshot=self.path)
+        mock_load.assert_not_called()
+        self.assertEqual(cached.n, graph.n)
+        _, num = BranchBoundSolver(cached).solve()
+        self.assertEqual(num, BranchBoundSolver(graph).solve()[1])
+
+class TestSolutionCache(unittest.TestCase):
+    """Кэш решений на диске"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.cache = SolutionCache(self.dir)
+        set_default_cache(self.cache)
+        self.addCleanup(set_default_cache, None)
+        path = os.path.join(TestGraphBuildModes.DATA_DIR, "schedule.json")
+        with open(path, encoding="utf-8") as f:
+            self.data = json.load(f)
+        self.graph = Graph.load_from_json(path)
+
+    def test_hit_independent_of_lesson_order(self):
+        colors, num = BranchBoundSolver(self.graph).solve()
+        self.assertEqual(self.cache.get_statistics()["stores"], 1)
+        shuffled = list(models.expand_lessons(self.data["lessons"]))
+        shuffled.reverse()
+        graph = Graph(shuffled)
+        solver = BranchBoundSolver(graph)
+        cached_colors, cached_num = solver.solve()
+        self.assertEqual(cached_num, num)
+        self.assertTrue(proper_coloring(graph, cached_colors))
+        self.assertTrue(solver.get_statistics()["cached"])
+        self.assertEqual(solver.nodes, 0)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_key_depends_on_solver_and_options(self):
+        BranchBoundSolver(self.graph).solve()
+        BranchBoundSolver(self.graph).solve(bounds="coloring")
+        IndependentSetSolver(self.graph).solve()
+        self.assertEqual(self.cache.hits, 0)
+        self.assertEqual(self.cache.misses, 3)
+        solver = BranchBoundSolver(self.graph)
+        solver.solve(bounds="coloring", time_limit=100)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_key_stable_for_bound_objects(self):
+        # Новый объект с теми же параметрами даёт тот же ключ, другие параметры - другой
+        BranchBoundSolver(self.graph).solve(bounds=[ColorClassBound(node_limit=50)])
+        BranchBoundSolver(self.graph).solve(bounds=[ColorClassBound(node_limit=50)])
+        self.assertEqual(self.cache.hits, 1)
+        BranchBoundSolver(self.graph).solve(bounds=[ColorClassBound(node_limit=60)])
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_interrupted_search_not_served(self):
+        solver = BranchBoundSolver(self.graph)
+        solver.solve(node_limit=1)
+        self.assertFalse(solver.get_statistics()["completed"])
+        solver = BranchBoundSolver(self.graph)
+        solver.solve()
+        self.assertFalse(solver.get_statistics()["cached"])
+        self.assertEqual(self.cache.hits, 0)
+        BranchBoundSolver(self.graph).solve()
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_corrupt_entry_is_miss(self):
+        IndependentSetSolver(self.graph).solve()
+        for name in os.listdir(self.dir):
+            with open(os.path.join(self.dir, name), "w") as f:
+                f.write("{broken")
+        _, num = IndependentSetSolver(self.graph).solve()
+        self.assertEqual(self.cache.hits, 0)
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_eviction(self):
+        cache = SolutionCache(self.dir, max_bytes=0)
+        set_default_cache(cache)
+        BranchBoundSolver(self.graph).solve()
+        IndependentSetSolver(self.graph).solve()
+        stats = cache.get_statistics()
+        self.assertEqual(stats["stores"], 2)
+        self.assertEqual(stats["evictions"], 2)
+        self.assertEqual(stats["entries"], 0)
+        with self.assertRaises(ValueError):
+            SolutionCache(self.dir, max_bytes=-1)
+
+class TestWarmStart(unittest.TestCase):
+    """Решение от прошлой раскраски"""
+
+    def setUp(self):
+        self.graph = Graph.load_from_json(os.path.join(TestGraphBuildModes.DATA_DIR, "perf_size30_density0.5.json"))
+        self.colors, self.num = BranchBoundSolver(self.graph).solve()
+
+    def test_repair_keeps_valid_coloring(self):
+        shifted = [c + 5 for c in self.colors]
+        repaired, recolored = self.graph.repair_coloring(shifted)
+        self.assertEqual(repaired, self.colors)
+        self.assertEqual(recolored, 0)
+
+    def test_repair_conflicts(self):
+        broken = list(self.colors)
+        for v in (0, 7, 12):
+            broken[v] = broken[self.graph.neighbors(v)[0]]
+        broken[20] = -1
+        repaired, recolored = self.graph.repair_coloring(broken)
+        self.assertTrue(proper_coloring(self.graph, repaired))
+        self.assertLessEqual(recolored, 4)
+        with self.assertRaises(ValueError):
+            self.graph.repair_coloring(broken[:-1])
+
+    @parameterized.expand([
+        ("branch_bound", BranchBoundSolver),
+        ("brown", BrownAlgorithm),
+        ("independent", IndependentSetSolver),
+    ])
+    def test_solvers_start_from_initial(self, name, Solver):
+        broken = list(self.colors)
+        broken[3] = -1
+        broken[5] = broken[self.graph.neighbors(5)[0]]
+        solver = Solver(self.graph)
+        colors, num = solver.solve(initial=broken)
+        self.assertTrue(proper_coloring(self.graph, colors))
+        # Рекорд не хуже починенной раскраски
+        self.assertLessEqual(num, max(self.graph.repair_coloring(broken)[0]) + 1)
+        stats = solver.get_statistics()
+        self.assertGreaterEqual(stats["repaired"], 1)
+        self.assertTrue(stats["completed"])
+
+    def test_optimal_initial_cuts_search(self):
+        cold = BrownAlgorithm(self.graph)
+        cold.solve(node_limit=2000)
+        self.assertFalse(cold.get_statistics()["completed"])
+        warm = BrownAlgorithm(self.graph)
+        colors, num = warm.solve(initial=self.colors)
+        self.assertEqual(num, self.num)
+        self.assertTrue(warm.get_statistics()["completed"])
+        self.assertLess(warm.nodes, 2000)
+
+    def test_load_saved_coloring(self):
+        path = os.path.join(tempfile.mkdtemp(), "result.json")
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        self.assertTrue(self.graph.save_coloring(path, self.colors))
+        self.assertEqual(self.graph.load_coloring(path), self.colors)
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        data["schedule"] = data["schedule"][1:]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        self.assertEqual(self.graph.load_coloring(path), [-1] + self.colors[1:])
+        with patch("builtins.print"):
+            self.assertIsNone(self.graph.load_coloring(path + ".missing"))
+
+class TestIncrementalEdits(unittest.TestCase):
+    """Правка занятий без пересборки графа"""
+
+    SIZES = {"subjects": 5, "groups": 8, "teachers": 6, "classrooms": 6, "hours": 4}
+
+    def _assert_rebuilt(self, graph):
+        reference = Graph(list(graph.table), build="pairwise")
+        self.assertEqual(graph.n, reference.n)
+        self.assertEqual([tuple(row) for row in graph.neighbor_lists], list(reference.neighbor_lists))
+        self.assertEqual(list(graph.degrees), list(reference.degrees))
+        self.assertEqual(list(graph.largest_first), list(reference.largest_first))
+        self.assertEqual(len(graph.adj), graph.n)
+        for v in range(graph.n):
+            self.assertEqual(list(graph.adj[v]), list(reference.adj[v]))
+            self.assertEqual(graph.neighbor_mask(v), reference.neighbor_mask(v))
+
+    @parameterized.expand([(backend,) for backend in Graph.BACKENDS])
+    def test_random_edits_match_rebuild(self, backend):
+        if backend == "numpy" and models.np is None:
+            self.skipTest("numpy не установлен")
+        rng = random.Random(backend)
+        data = [random_lesson(rng, i, **self.SIZES) for i in range(8)]
+        graph = Graph(LessonTable.expand(data), build="indexed", backend=backend)
+        ids = [lesson["id"] for lesson in data]
+        for step in range(30):
+            op = rng.randrange(3)
+            if op == 0 or not ids:
+                lesson = random_lesson(rng, 100 + step, **self.SIZES)
+                ids.append(lesson["id"])
+                graph.add_lesson(lesson)
+            elif op == 1:
+                lesson_id = rng.choice(ids)
+                ids.remove(lesson_id)
+                graph.remove_lesson(lesson_id)
+            else:
+                changes = random_lesson(rng, 0, **self.SIZES)
+                del changes["id"]
+                keys = rng.sample(sorted(changes), rng.randrange(1, 4))
+                graph.modify_lesson(rng.choice(ids), **{key: changes[key] for key in keys})
+            self._assert_rebuilt(graph)
+
+    def test_hours_change_and_lesson_objects(self):
+        lessons = [Lesson("L1_0", "S1", "lecture", ["G1"], "T1", "R1", 1),
+                   Lesson("L2_0", "S2", "lecture", ["G2"], "T2", "R2", 2, 0),
+                   Lesson("L2_1", "S2", "lecture", ["G2"], "T2", "R2", 2, 1)]
+        graph = Graph(lessons)
+        graph.modify_lesson("L2", hours_per_week=3, teacher="T1")
+        self.assertEqual(sorted(l.id for l in graph.lessons), ["L1_0", "L2_0", "L2_1", "L2_2"])
+        self.assertEqual(graph.degree(0), 3)
+        graph.modify_lesson("L2", hours_per_week=1)
+        self.assertEqual(sorted(l.id for l in graph.lessons), ["L1_0", "L2_0"])
+        self._assert_rebuilt(graph)
+        with self.assertRaises(ValueError):
+            graph.remove_lesson("L9")
+        with self.assertRaises(ValueError):
+            graph.modify_lesson("L1", room="R5")
+        with self.assertRaises(ValueError):
+            graph.modify_lesson("L1", hours_per_week=0)
+
+    def test_dense_edit_touches_only_affected_rows(self):
+        data = random_schedule(4, 8, **self.SIZES)
+        graph = Graph(LessonTable.expand(data), build="indexed")
+        before = list(graph.adj.rows)
+        new = graph.add_lesson({"id": "N", "subject": "S", "groups": [data[0]["groups"][0]],
+                                "teacher": "TN", "classroom": "RN"})
+        affected = set(new) | {u for v in new for u in graph.neighbors(v)}
+        for v in range(len(before)):
+            if v not in affected:
+                self.assertIs(graph.adj.rows[v], before[v])
+        self._assert_rebuilt(graph)
+
+    def test_duplicate_id_rejected(self):
+        data = random_schedule(4, 8, **self.SIZES)
+        graph = Graph(LessonTable.expand(data), build="indexed")
+        n = graph.n
+        with self.assertRaises(ValueError):
+            graph.add_lesson(dict(data[0], groups=["X"]))
+        self.assertEqual(graph.n, n)
+        self._assert_rebuilt(graph)
+
+    def test_warm_start_after_edit(self):
+        graph = Graph.load_from_json(os.path.join(TestGraphBuildModes.DATA_DIR, "schedule.json"))
+        colors, num = BranchBoundSolver(graph).solve()
+        slots = graph.coloring_ids(colors)
+        first = graph.lessons[0]
+        graph.remove_lesson(first.id.rsplit("_", 1)[0])
+        graph.add_lesson({"id": "extra", "subject": first.subject, "groups": first.groups,
+                          "teacher": first.teacher, "classroom": first.classroom, "hours_per_week": 1})
+        self.assertIsNone(graph.source_hash)
+        initial = graph.coloring_from_ids(slots)
+        self.assertEqual(initial.count(-1), 1)
+        solver = BranchBoundSolver(graph)
+        colors, new_num = solver.solve(initial=initial)
+        self.assertTrue(proper_coloring(graph, colors))
+        self.assertLessEqual(solver.get_statistics()["repaired"], 1)
+
+class TestComponents(unittest.TestCase):
+    """Решение по компонентам связности"""
+
+    def setUp(self):
+        # Три факультета без общих ресурсов и одно отдельное занятие
+        data = []
+        for f in range(3):
+            rng = random.Random(f)
+            for i in range(6):
+                data.append({"id": f"F{f}L{i}", "subject": "S", "groups": [f"F{f}G{rng.randrange(3)}"],
+                             "teacher": f"F{f}T{rng.randrange(3)}", "classroom": f"F{f}R{rng.randrange(3)}",
+                             "hours_per_week": 2})
+        data.append({"id": "alone", "subject": "S", "groups": ["X"], "teacher": "X", "classroom": "X"})
+        self.graph = Graph(LessonTable.expand(data), build="indexed")
+
+    def test_components(self):
+        parts = self.graph.components()
+        self.assertEqual(sorted(len(part) for part in parts), [1, 12, 12, 12])
+        self.assertEqual(sorted(v for part in parts for v in part), list(range(self.graph.n)))
+        for part in parts:
+            inside = set(part)
+            for v in part:
+                self.assertTrue(set(self.graph.neighbors(v)) <= inside)
+
+    def test_subgraph(self):
+        part = self.graph.components()[0]
+        sub = self.graph.subgraph(part)
+        self.assertEqual(sub.n, len(part))
+        self.assertEqual([l.id for l in sub.lessons], [self.graph.lessons[v].id for v in part])
+        rebuilt = Graph(list(sub.lessons), build="pairwise")
+        self.assertEqual(list(sub.neighbor_lists), list(rebuilt.neighbor_lists))
+
+    @parameterized.expand([
+        ("branch_bound",),
+        ("brown",),
+        ("independent",),
+    ])
+    def test_same_colors_as_whole_graph(self, name):
+        solver = ComponentSolver(self.graph, name)
+        colors, num = solver.solve()
+        self.assertTrue(proper_coloring(self.graph, colors))
+        self.assertEqual(num, max(colors) + 1)
+        _, whole = BranchBoundSolver(self.graph).solve()
+        self.assertLessEqual(num, whole)
+        stats = solver.get_statistics()
+        self.assertEqual(len(stats["components"]), 4)
+        self.assertEqual(num, max(part["colors"] for part in stats["components"]))
+        self.assertTrue(stats["completed"])
+
+    def test_parallel(self):
+        colors, num = ComponentSolver(self.graph).solve(workers=2)
+        self.assertTrue(proper_coloring(self.graph, colors))
+        self.assertEqual(num, ComponentSolver(self.graph).solve()[1])
+
+    def test_initial_split_by_component(self):
+        colors, num = ComponentSolver(self.graph).solve()
+        solver = ComponentSolver(self.graph)
+        warm, warm_num = solver.solve(initial=colors)
+        self.assertEqual(warm_num, num)
+        self.assertTrue(proper_coloring(self.graph, warm))
+
+    def test_unknown_solver(self):
+        with self.assertRaises(ValueError):
+            ComponentSolver(self.graph, "dsatur_magic")
+
+class TestReduction(unittest.TestCase):
+    """Сокращение графа до ядра перед точным поиском"""
+
+    SIZES = {"groups": 10, "teachers": 12, "classrooms": 15, "hours": 3}
+
+    @parameterized.expand([
+        ("branch_bound",),
+        ("brown",),
+        ("independent",),
+    ])
+    def test_valid_and_not_worse(self, name):
+        for seed in range(20):
+            graph = Graph(LessonTable.expand(random_schedule(seed, 20, **self.SIZES)), build="indexed")
+            solver = ReducedSolver(graph, name)
+            colors, num = solver.solve()
+            self.assertTrue(proper_coloring(graph, colors))
+            self.assertEqual(num, max(colors) + 1)
+            self.assertGreaterEqual(num, solver.get_statistics()["lower_bound"])
+            _, whole = BranchBoundSolver(graph).solve()
+            self.assertLessEqual(num, whole)
+
+    def test_dominated(self):
+        # Соседи v (a и b) - соседи и у несмежной с v вершины u
+        data = [
+            {"id": "v", "subject": "S", "groups": ["A"], "teacher": "TB", "classroom": "Rv"},
+            {"id": "a", "subject": "S", "groups": ["A"], "teacher": "Ta", "classroom": "Ra"},
+            {"id": "b", "subject": "S", "groups": ["B"], "teacher": "TB", "classroom": "Rb"},
+            {"id": "u", "subject": "S", "groups": ["C"], "teacher": "Ta", "classroom": "Rb"},
+            {"id": "c", "subject": "S", "groups": ["C"], "teacher": "Tc", "classroom": "Rc"},
+        ]
+        graph = Graph(LessonTable.expand(data), build="indexed")
+        alive, removed = reduce_graph(graph, 0)
+        self.assertIn(DOMINATED, [rule for _, rule, _ in removed])
+        for v, rule, u in removed:
+            if rule == DOMINATED:
+                self.assertNotIn(u, graph.neighbors(v))
+        colors = [-1] * graph.n
+        kernel = [v for v in range(graph.n) if alive >> v & 1]
+        for c, v in enumerate(kernel):
+            colors[v] = c
+        colors = extend_coloring(graph, colors, removed)
+        self.assertTrue(proper_coloring(graph, colors))
+
+    def test_sparse_kernel_empty(self):
+        # Занятия без общих ресурсов, кроме пар: степень 1 меньше клики из 2 вершин
+        data = [{"id": f"L{i}", "subject": "S", "groups": [f"G{i // 2}"], "teacher": f"T{i}", "classroom": f"R{i}"}
+                for i in range(40)]
+        graph = Graph(LessonTable.expand(data), build="indexed")
+        solver = ReducedSolver(graph)
+        colors, num = solver.solve()
+        stats = solver.get_statistics()
+        self.assertEqual(num, 2)
+        self.assertEqual(stats["kernel_size"], 0)
+        self.assertEqual(stats["peeled"] + stats["dominated"], graph.n)
+        self.assertTrue(stats["optimal"])
+        self.assertTrue(proper_coloring(graph, colors))
+
+    def test_statistics(self):
+        graph = Graph(LessonTable.expand(random_schedule(3, 20, **self.SIZES)), build="indexed")
+        solver = ReducedSolver(graph)
+        colors, _ = solver.solve(initial=BranchBoundSolver(graph).solve()[0])
+        stats = solver.get_statistics()
+        for key in ("solver", "kernel_size", "peeled", "dominated", "reduction_time", "kernel",
+                    "lower_bound", "gap", "optimal", "completed", "time"):
+            self.assertIn(key, stats)
+        self.assertEqual(stats["kernel_size"] + stats["peeled"] + stats["dominated"], graph.n)
+        self.assertTrue(proper_coloring(graph, colors))
+
+    def test_unknown_solver(self):
+        graph = Graph(LessonTable.expand(random_schedule(0, 5, **self.SIZES)), build="indexed")
+        with self.assertRaises(ValueError):
+            ReducedSolver(graph, "dsatur_magic")
+
+class TestTwinSymmetry(unittest.TestCase):
+    """Отсечение перестановок цветов у близнецов"""
+
+    def setUp(self):
+        # Лекции по 3-4 часа: экземпляры одного занятия - близнецы
+        rng = random.Random(36)
+        self.data = [{"id": f"L{i}", "subject": "S", "groups": [f"G{rng.randrange(4)}"],
+                      "teacher": f"T{rng.randrange(5)}", "classroom": f"R{rng.randrange(6)}",
+                      "hours_per_week": rng.randrange(3, 5)} for i in range(6)]
+        self.graph = Graph(LessonTable.expand(self.data), build="indexed")
+
+    def test_twins(self):
+        twins = self.graph.twins
+        self.assertTrue(twins)
+        for cls in twins:
+            self.assertEqual(list(cls), sorted(cls))
+            closed = {frozenset(self.graph.neighbors(v)) | {v} for v in cls}
+            self.assertEqual(len(closed), 1)
+        # Экземпляры одного занятия всегда в одном классе
+        for v, lesson in enumerate(self.graph.lessons):
+            same = [u for u, other in enumerate(self.graph.lessons) if other.id.split("_")[0] == lesson.id.split("_")[0]]
+            if len(same) > 1:
+                self.assertTrue(any(set(same) <= set(cls) for cls in twins))
+
+    def test_twins_after_edit(self):
+        before = len(self.graph.twins)
+        self.graph.add_lesson({"id": "X", "subject": "S", "groups": ["X"], "teacher": "X", "classroom": "X",
+                               "hours_per_week": 2})
+        self.assertEqual(len(self.graph.twins), before + 1)
+
+    @parameterized.expand([
+        ("branch_bound", BranchBoundSolver),
+        ("brown", BrownAlgorithm),
+    ])
+    def test_same_colors_fewer_nodes(self, name, solver_class):
+        plain = solver_class(self.graph)
+        _, plain_k = plain.solve(symmetry=False)
+        solver = solver_class(self.graph)
+        colors, k = solver.solve()
+        self.assertEqual(k, plain_k)
+        self.assertTrue(proper_coloring(self.graph, colors))
+        self.assertLessEqual(solver.nodes, plain.nodes)
+        self.assertEqual(solver.get_statistics()["twin_classes"], len(self.graph.twins))
+
+    def test_brown_prunes_permutations(self):
+        plain = BrownAlgorithm(self.graph)
+        plain.solve(symmetry=False)
+        solver = BrownAlgorithm(self.graph)
+        solver.solve()
+        self.assertLess(solver.nodes, plain.nodes)
+
+class TestHeuristics(unittest.TestCase):
+    """Быстрые эвристики: DSatur, RLF, TabuCol"""
+
+    SIZES = {"groups": 6, "teachers": 8, "classrooms": 8, "hours": 4}
+
+    @staticmethod
+    def _hard(seed):
+        # Много групп у каждого занятия, ресурсы почти не повторяются:
+        # граф похож на случайный, и DSatur ошибается
+        rng = random.Random(seed)
+        data = [{"id": f"L{i}", "subject": "S", "groups": [f"G{rng.randrange(300)}" for _ in range(6)],
+                 "teacher": f"T{i}", "classroom": f"R{i}", "hours_per_week": rng.randrange(1, 3)} for i in range(300)]
+        return Graph(LessonTable.expand(data), build="indexed", backend="csr")
+
+    @parameterized.expand([
+        ("dsatur",),
+        ("rlf",),
+        ("tabucol",),
+    ])
+    def test_valid(self, name):
+        for seed in range(20):
+            graph = Graph(LessonTable.expand(random_schedule(seed, 12, **self.SIZES)), build="indexed")
+            solver = HEURISTICS[name](graph)
+            colors, num = solver.solve()
+            self.assertTrue(proper_coloring(graph, colors))
+            self.assertEqual(num, max(colors) + 1)
+            stats = solver.get_statistics()
+            self.assertGreaterEqual(num, stats["lower_bound"])
+            self.assertEqual(stats["optimal"], num == stats["lower_bound"])
+
+    @parameterized.expand([
+        ("dsatur",),
+        ("rlf",),
+        ("tabucol",),
+    ])
+    def test_empty(self, name):
+        self.assertEqual(HEURISTICS[name](Graph([])).solve(), ([], 0))
+
+    def test_clique_from_busiest_resource(self):
+        # У преподавателя T 5 занятий: клика не меньше 5
+        data = [{"id": f"L{i}", "subject": "S", "groups": [f"G{i}"], "teacher": "T", "classroom": f"R{i}"}
+                for i in range(5)]
+        data.append({"id": "X", "subject": "S", "groups": ["G0"], "teacher": "Y", "classroom": "Z"})
+        graph = Graph(LessonTable.expand(data), build="indexed")
+        clique = greedy_clique(graph)
+        self.assertGreaterEqual(len(clique), 5)
+        for i, v in enumerate(clique):
+            for u in clique[:i]:
+                self.assertIn(u, graph.neighbors(v))
+        solver = DSaturSolver(graph)
+        _, num = solver.solve()
+        self.assertEqual(num, 5)
+        self.assertTrue(solver.get_statistics()["optimal"])
+
+    def test_clique_on_synthetic_edges(self):
+        # Все занятия у одного преподавателя, но рёбра случайные: корзина ресурса - не клика
+        rng = random.Random(0)
+        lessons = [Lesson(f"L{i}", "S", "lecture", ["G"], "T", f"R{i}", 1) for i in range(30)]
+        edges = [(u, v) for u in range(30) for v in range(u) if rng.random() < 0.2]
+        graph = Graph.from_edges(lessons, edges)
+        clique = greedy_clique(graph)
+        self.assertEqual(len(set(clique)), len(clique))
+        for i, v in enumerate(clique):
+            for u in clique[:i]:
+                self.assertIn(u, graph.neighbors(v))
+        solver = DSaturSolver(graph)
+        _, num = solver.solve()
+        self.assertLessEqual(solver.get_statistics()["lower_bound"], num)
+
+    def test_greedy_matches_upper_bound(self):
+        graph = Graph(LessonTable.expand(random_schedule(1, 12, **self.SIZES)), build="indexed")
+        self.assertEqual(greedy_coloring(graph), BranchBoundSolver(graph)._upper_bound())
+        self.assertEqual(greedy_coloring(graph), IndependentSetSolver(graph)._upper_bound())
+
+    def test_tabucol_improves_dsatur(self):
+        graph = self._hard(1)
+        _, dsatur = DSaturSolver(graph).solve()
+        solver = TabuColSolver(graph)
+        colors, num = solver.solve(time_limit=10)
+        self.assertTrue(proper_coloring(graph, colors))
+        self.assertLess(num, dsatur)
+        stats = solver.get_statistics()
+        self.assertGreater(stats["improvements"], 0)
+        self.assertLessEqual(stats["iterations"], 10000)
+
+    def test_tabucol_limits(self):
+        graph = self._hard(1)
+        dsatur, num = DSaturSolver(graph).solve()
+        solver = TabuColSolver(graph)
+        self.assertEqual(solver.solve(iterations=0), (dsatur, num))
+        self.assertEqual(solver.get_statistics()["iterations"], 0)
+        colors, _ = solver.solve(time_limit=0)
+        self.assertEqual(colors, dsatur)
+        with self.assertRaises(ValueError):
+            solver.solve(iterations=None)
+
+    def test_tabucol_initial(self):
+        graph = Graph(LessonTable.expand(random_schedule(2, 12, **self.SIZES)), build="indexed")
+        broken = [0] * graph.n
+        colors, _ = TabuColSolver(graph).solve(initial=broken)
+        self.assertTrue(proper_coloring(graph, colors))
+
+    def test_incumbent_for_exact_solver(self):
+        graph = Graph(LessonTable.expand(random_schedule(3, 12, **self.SIZES)), build="indexed")
+        colors, num = DSaturSolver(graph).solve()
+        _, exact = BranchBoundSolver(graph).solve(initial=colors)
+        self.assertLessEqual(exact, num)
+
+class TestSpawnWorkers(unittest.TestCase):
+    """Параллельные режимы при запуске процессов через spawn (по умолчанию
+    в Windows и macOS): граф передаётся исполнителям через pickle"""
+
+    def setUp(self):
+        rng = random.Random(5)
+        data = [{"id": f"L{i}", "subject": "S", "groups": [f"G{rng.randrange(4)}"],
+                 "teacher": f"T{rng.randrange(4)}", "classroom": f"R{rng.randrange(4)}"} for i in range(12)]
+        self.spawn = multiprocessing.get_context("spawn")
+        self.graphs = [Graph(LessonTable.expand(data), build="indexed", backend=backend)
+                       for backend in ("dense", "bitset", "csr")]
+
+    def test_pickle_graph(self):
+        for graph in self.graphs:
+            graph.smallest_last
+            copy = pickle.loads(pickle.dumps(graph))
+            self.assertEqual([tuple(row) for row in copy.neighbor_lists], [tuple(row) for row in graph.neighbor_lists])
+            self.assertEqual(list(copy.degrees), list(graph.degrees))
+            self.assertEqual(list(copy.largest_first), list(graph.largest_first))
+            self.assertEqual(list(copy.smallest_last), list(graph.smallest_last))
+
+    def test_parallel_branch_bound(self):
+        for graph in self.graphs:
+            _, num = BranchBoundSolver(graph).solve()
+            with patch("multiprocessing.get_context", return_value=self.spawn):
+                colors, par_num = BranchBoundSolver(graph).solve_parallel(workers=2, split_depth=1)
+            self.assertEqual(par_num, num)
+            self.assertTrue(proper_coloring(graph, colors))
+
+    def test_portfolio(self):
+        graph = self.graphs[2]
+        with patch("multiprocessing.get_context", return_value=self.spawn):
+            solver = PortfolioSolver(graph)
+            colors, num = solver.solve(time_limit=30)
+        self.assertIsNotNone(solver.get_statistics()["winner"])
+        self.assertTrue(proper_coloring(graph, colors))
+
+    def test_components(self):
+        data = [{"id": f"F{f}L{i}", "subject": "S", "groups": [f"F{f}G{i % 2}"], "teacher": f"F{f}T",
+                 "classroom": f"F{f}R{i}"} for f in range(2) for i in range(4)]
+        graph = Graph(LessonTable.expand(data), build="indexed", backend="csr")
+        with patch("multiprocessing.get_context", return_value=self.spawn):
+            colors, num = ComponentSolver(graph).solve(workers=2)
+        self.assertEqual(num, 4)
+        self.assertTrue(proper_coloring(graph, colors))
+
+class TestReadOnlyAdjacency(unittest.TestCase):
+    """Матрица смежности только для чтения, рёбра задаются через from_edges"""
+
+    def setUp(self):
+        self.lessons = [Lesson(f"v{i}", f"S{i}", "lecture", [f"G{i}"], f"T{i}", f"R{i}", 1) for i in range(4)]
+
+    @parameterized.expand([
+        ("dense",),
+        ("bitset",),
+        ("csr",),
+    ])
+    def test_adj_is_read_only(self, backend):
+        graph = Graph(self.lessons, backend=backend)
+        with self.assertRaises(AttributeError):
+            graph.adj = [[True] * 4 for _ in range(4)]
+        with self.assertRaises(TypeError):
+            graph.adj[0][1] = True
+        self.assertEqual(graph.neighbors(0), ())
+
+    @parameterized.expand([
+        ("dense",),
+        ("bitset",),
+        ("csr",),
+    ])
+    def test_from_edges(self, backend):
+        edges = [(i, j) for i in range(4) for j in range(i + 1, 4)]
+        graph = Graph.from_edges(self.lessons, edges, backend=backend)
+        self.assertEqual(list(graph.neighbors(0)), [1, 2, 3])
+        self.assertTrue(graph.adj[2][3])
+        self.assertEqual(BranchBoundSolver(graph).solve()[1], 4)
+
 if __name__ == '__main__':
     unittest.main()